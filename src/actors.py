@@ -0,0 +1,168 @@
+from array import array
+
+import pygame
+from player import DIRECTIONS, Player, sprite_cache
+from render_queue import RenderQueue
+from log import get_logger
+
+logger = get_logger("actors")
+
+STATES = ("idle", "walk")  # Index stored in ActorSystem.state
+IDLE, WALK = 0, 1
+RIGHT, UP, LEFT, DOWN = (DIRECTIONS.index(name) for name in ("right", "up", "left", "down"))
+
+
+class ActorSystem:
+    """
+    NPCs (customers, kitchen staff, ...) of the current map as a structure of arrays:
+    actor i is pos_x[i], pos_y[i], vel_x[i], direction[i], ... so update() and draw() are
+    passes over flat arrays instead of a method call per object.
+
+    Actors walk like the Player: same sprite sheet layout (frames come from the shared
+    sprite_cache), same collision box at the legs, same animation timing. Indices are
+    only stable until remove(), which moves the last actor into the gap.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.pos_x = array("d")
+        self.pos_y = array("d")
+        self.old_x = array("d")  # Position at the start of the current simulation step
+        self.old_y = array("d")
+        self.vel_x = array("d")  # Pixels per second
+        self.vel_y = array("d")
+        self.direction = array("B")  # Index into DIRECTIONS
+        self.state = array("B")  # IDLE or WALK
+        self.frame = array("B")
+        self.animation_timer = array("d")
+        self.animations = []  # Shared frame table of every actor, see SpriteCache.get_animations
+        self.boxes = []  # (width, height, offset_y) of every actor's collision box
+
+    def __len__(self):
+        return len(self.names)
+
+    def spawn(self, name, x, y, width=16, height=32, sprite_sheet="player"):
+        """Adds an idle actor facing down at (x, y), returns its index."""
+        self.names.append(name)
+        for column, value in ((self.pos_x, x), (self.pos_y, y), (self.old_x, x), (self.old_y, y),
+                              (self.vel_x, 0.0), (self.vel_y, 0.0), (self.animation_timer, 0.0)):
+            column.append(float(value))
+        self.direction.append(DOWN)
+        self.state.append(IDLE)
+        self.frame.append(0)
+        self.animations.append(sprite_cache.get_animations(sprite_sheet, width, height))
+        self.boxes.append((width * 3, height, height * 2))  # Same legs box as Player
+        return len(self.names) - 1
+
+    def columns(self):
+        return (self.names, self.pos_x, self.pos_y, self.old_x, self.old_y, self.vel_x, self.vel_y,
+                self.direction, self.state, self.frame, self.animation_timer, self.animations, self.boxes)
+
+    def remove(self, index):
+        """Removes actor index, the last actor takes its index."""
+        for column in self.columns():
+            column[index] = column[-1]
+            column.pop()
+
+    def clear(self):
+        """Removes all actors, e.g. when the player leaves the map."""
+        for column in self.columns():
+            del column[:]
+
+    def set_velocity(self, index, vel_x, vel_y):
+        """Starts (or stops, with 0, 0) actor index walking, horizontal movement decides the facing like for the Player."""
+        self.vel_x[index] = vel_x
+        self.vel_y[index] = vel_y
+        if vel_x:
+            self.direction[index] = RIGHT if vel_x > 0 else LEFT
+        elif vel_y:
+            self.direction[index] = DOWN if vel_y > 0 else UP
+
+    def begin_step(self):
+        """Remembers where this simulation step started, drawing interpolates from here."""
+        self.old_x = self.pos_x[:]
+        self.old_y = self.pos_y[:]
+
+    def update(self, tilemap, dt):
+        """Advances every actor by one simulation step: movement and collision, then animation."""
+        self.move_all(tilemap, dt)
+        self.animate_all(dt)
+
+    def move_all(self, tilemap, dt):
+        """
+        Moves every walking actor, x then y. A step that would end inside a blocker is
+        dropped and the velocity on that axis set to 0, so behaviour code sees the bump.
+        """
+        pos_x, pos_y, vel_x, vel_y, boxes = self.pos_x, self.pos_y, self.vel_x, self.vel_y, self.boxes
+        query_blockers = tilemap.query_blockers
+        for i in range(len(pos_x)):
+            dx, dy = vel_x[i] * dt, vel_y[i] * dt
+            if not dx and not dy:
+                continue
+            width, height, offset_y = boxes[i]
+            if dx:
+                x = pos_x[i] + dx
+                if query_blockers(pygame.Rect(int(x), int(pos_y[i]) + offset_y, width, height)):
+                    vel_x[i] = 0.0
+                else:
+                    pos_x[i] = x
+            if dy:
+                y = pos_y[i] + dy
+                if query_blockers(pygame.Rect(int(pos_x[i]), int(y) + offset_y, width, height)):
+                    vel_y[i] = 0.0
+                else:
+                    pos_y[i] = y
+
+    def animate_all(self, dt):
+        """Walking or idle cycle of every actor, one frame every Player.FRAME_TIME seconds."""
+        vel_x, vel_y, state, frame, timer = self.vel_x, self.vel_y, self.state, self.frame, self.animation_timer
+        frame_time = Player.FRAME_TIME
+        for i in range(len(timer)):
+            moving = WALK if vel_x[i] or vel_y[i] else IDLE
+            timer[i] += dt
+            if timer[i] >= frame_time:
+                timer[i] -= frame_time
+                frame[i] = (frame[i] + 1) % len(self.animations[i][DIRECTIONS[self.direction[i]]][STATES[moving]])
+            state[i] = moving
+
+    def get_sprite(self, index):
+        return self.animations[index][DIRECTIONS[self.direction[index]]][STATES[self.state[index]]][self.frame[index]]
+
+    def get_sprite_rects(self, camera, alpha=1.0):
+        """Screen rect of every actor's current frame, computed like Player.get_sprite_rect."""
+        rects = []
+        pos_x, pos_y, old_x, old_y = self.pos_x, self.pos_y, self.old_x, self.old_y
+        for i in range(len(pos_x)):
+            sprite = self.get_sprite(i)
+            x = old_x[i] + (pos_x[i] - old_x[i]) * alpha
+            y = old_y[i] + (pos_y[i] - old_y[i]) * alpha
+            rects.append(pygame.Rect(int(round(x) - camera.offset_x), int(round(y) - camera.offset_y),
+                                     sprite.get_width(), sprite.get_height()))
+        return rects
+
+    def get_sprites(self, camera, alpha=1.0):
+        """{("actor", i): (screen rect, frame key)}, in the form DirtyRectRenderer.present() takes."""
+        return {("actor", i): (rect, (self.direction[i], self.state[i], self.frame[i]))
+                for i, rect in enumerate(self.get_sprite_rects(camera, alpha))}
+
+    def queue_sprites(self, render_queue, camera, alpha=1.0, view=None):
+        """Adds the actors (only those inside the screen rect view, if given) to render_queue, sorted by their feet."""
+        for i, rect in enumerate(self.get_sprite_rects(camera, alpha)):
+            if view is None or rect.colliderect(view):
+                render_queue.add(rect.bottom + camera.offset_y, self.get_sprite(i), rect.topleft)
+
+    def draw(self, screen, camera, alpha=1.0, others=()):
+        """
+        Draws the actors back to front, with others (e.g. the Player: anything with
+        queue_sprite()) sorted in. In the game the map's render queue does this instead.
+        """
+        render_queue = RenderQueue()
+        self.queue_sprites(render_queue, camera, alpha, screen.get_clip())
+        for other in others:
+            other.queue_sprite(render_queue, camera, alpha)
+        render_queue.draw(screen)
+
+    def get_state(self):
+        """Actor positions and animation as plain data (for the replay hash)."""
+        return [[self.names[i], repr(self.pos_x[i]), repr(self.pos_y[i]), DIRECTIONS[self.direction[i]],
+                 STATES[self.state[i]], self.frame[i]] for i in range(len(self.names))]
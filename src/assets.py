@@ -0,0 +1,164 @@
+from collections import namedtuple
+from types import MappingProxyType
+
+import pygame
+from log import get_logger
+
+logger = get_logger("assets")
+
+ATLAS_SIZE = 1024  # Width and height of an atlas page, bigger images get a page of their own
+
+# Name -> file, the names are what the game asks for
+IMAGES = {
+    "player": "../assets/player.png",
+    "skills": "../assets/skills.png",
+    "cursor": "../assets/ui/cursor.png",
+    "inventory_slot": "../assets/ui/inventory_slot.png",
+    "items/Wheat": "../assets/items/wheat.png",
+    "items/Flour": "../assets/items/flour.png",
+}
+
+
+class AtlasPage:
+    """One atlas surface, filled shelf by shelf (rows as high as their tallest image)."""
+
+    def __init__(self, width, height):
+        self.surface = pygame.Surface((width, height), pygame.SRCALPHA).convert_alpha()
+        self.shelves = []  # [y, height, next free x]
+        self.next_y = 0
+
+    def insert(self, image):
+        """Copies image into the page, returns its rect or None if it doesn't fit."""
+        width, height = image.get_size()
+        page_width, page_height = self.surface.get_size()
+        position = None
+        for shelf in self.shelves:
+            if height <= shelf[1] and shelf[2] + width <= page_width:
+                position = (shelf[2], shelf[0])
+                shelf[2] += width
+                break
+        if position is None:
+            if width > page_width or self.next_y + height > page_height:
+                return None
+            position = (0, self.next_y)
+            self.shelves.append([self.next_y, height, width])
+            self.next_y += height
+
+        # The page is transparent here, so MAX copies the pixels including their alpha
+        self.surface.blit(image, position, special_flags=pygame.BLEND_RGBA_MAX)
+        return pygame.Rect(position, (width, height))
+
+
+class AssetManager:
+    """
+    Loads every image file exactly once and packs it into shared atlas pages.
+    get() returns a subsurface of the atlas by name, get_scaled() a cached scaled copy,
+    so any number of inventories, storages or players share the same pixels.
+    """
+
+    def __init__(self, images=IMAGES, atlas_size=ATLAS_SIZE):
+        self.images = images
+        self.atlas_size = atlas_size
+        self.pages = []
+        self.regions = {}  # name -> subsurface of an atlas page
+        self.scaled = {}  # (name, size) -> scaled surface
+
+    def load_all(self, names=None):
+        """
+        Packs the registered images names (default: all of them) at once, tallest first,
+        which packs the shelves tighter. Images that are already packed are skipped.
+        """
+        names = self.images if names is None else names
+        images = [(name, self.load_file(self.images[name])) for name in names if name not in self.regions]
+        images.sort(key=lambda entry: entry[1].get_height(), reverse=True)
+        for name, image in images:
+            self.add(name, image)
+        logger.info("🖼️ Packed %d images into %d atlas page(s)", len(self.regions), len(self.pages))
+
+    def load_file(self, path):
+        return pygame.image.load(path).convert_alpha()
+
+    def add(self, name, image):
+        """Packs image into the first page with room for it, opening a new page if needed."""
+        for page in self.pages:
+            rect = page.insert(image)
+            if rect:
+                break
+        else:
+            page = AtlasPage(max(self.atlas_size, image.get_width()), max(self.atlas_size, image.get_height()))
+            self.pages.append(page)
+            rect = page.insert(image)
+        self.regions[name] = page.surface.subsurface(rect)
+        return self.regions[name]
+
+    def get(self, name):
+        """Returns the image registered as name (or the file at path name), loading it on first use."""
+        region = self.regions.get(name)
+        if region is None:
+            region = self.add(name, self.load_file(self.images.get(name, name)))
+        return region
+
+    def get_scaled(self, name, size):
+        """Returns the image scaled to size, every size is only scaled once."""
+        key = (name, tuple(size))
+        scaled = self.scaled.get(key)
+        if scaled is None:
+            scaled = pygame.transform.scale(self.get(name), key[1])
+            self.scaled[key] = scaled
+        return scaled
+
+
+assets = AssetManager()  # Shared by all modules
+
+# Slot background and item images of an inventory style UI, item_images is read-only
+SlotImages = namedtuple("SlotImages", ["slot_image", "item_images"])
+
+
+class ResourceRegistry:
+    """
+    Immutable resources shared by reference count. acquire() builds a resource the
+    first time its key is asked for and hands the same object to everybody after that,
+    release() drops it once nobody holds it anymore.
+    """
+
+    def __init__(self):
+        self.resources = {}  # key -> [resource, reference count]
+
+    def acquire(self, key, factory):
+        entry = self.resources.get(key)
+        if entry is None:
+            entry = [factory(), 0]
+            self.resources[key] = entry
+        entry[1] += 1
+        return entry[0]
+
+    def release(self, key):
+        entry = self.resources.get(key)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del self.resources[key]
+            logger.debug("Released %s", key)
+
+    def refcount(self, key):
+        entry = self.resources.get(key)
+        return entry[1] if entry else 0
+
+
+registry = ResourceRegistry()  # Shared by Inventory and every Storage
+
+
+def acquire_slot_images(slot_size, item_names, item_size=(48, 48)):
+    """
+    Returns (key, SlotImages) for slots of slot_size holding item_names, scaled once and
+    shared by every caller with the same sizes. Hand the key to registry.release() when done.
+    """
+    key = ("slot_images", tuple(slot_size), tuple(item_names), tuple(item_size))
+
+    def load():
+        item_images = {name: pygame.transform.scale(assets.get(f"items/{name}"), item_size) for name in item_names}
+        return SlotImages(pygame.transform.scale(assets.get("inventory_slot"), slot_size),
+                          MappingProxyType(item_images))
+
+    return key, registry.acquire(key, load)
@@ -0,0 +1,74 @@
+"""
+Benchmark for the batched ActorSystem update and y-sorted draw.
+
+Spawns N wandering actors on the start map and times one simulation step and one
+drawn frame (800x600, camera in the middle of the map).
+Run from the src folder:  python bench_actors.py [actors] [ticks]
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # No window needed
+import pygame
+
+import log
+from actors import ActorSystem
+from assets import assets
+from game import START_MAP
+from map_loader import map_loader
+from player import Camera, Player
+
+WALK_SPEED = 80  # Pixels per second
+
+
+def wander(actors, rng):
+    """Gives every actor a new random direction (or a rest)."""
+    for i in range(len(actors)):
+        choice = rng.randrange(5)
+        vel_x, vel_y = ((WALK_SPEED, 0), (-WALK_SPEED, 0), (0, WALK_SPEED), (0, -WALK_SPEED), (0, 0))[choice]
+        actors.set_velocity(i, vel_x, vel_y)
+
+
+def run(count, ticks, seed=1):
+    pygame.display.init()
+    screen = pygame.display.set_mode((800, 600))
+    log.setup("WARNING")
+    assets.load_all()
+    tilemap = map_loader.get(START_MAP)
+    rng = random.Random(seed)
+
+    player = Player(tilemap.map_pixel_width / 2, tilemap.map_pixel_height / 2, 16, 32)
+    camera = Camera(*screen.get_size())
+    camera.set_map_size(tilemap.map_pixel_width, tilemap.map_pixel_height)
+    camera.update(player)
+
+    # Spread the actors over the visible area, so all of them are drawn
+    actors = ActorSystem()
+    for i in range(count):
+        actors.spawn(f"npc_{i}", camera.offset_x + rng.randrange(800), camera.offset_y + rng.randrange(600))
+
+    update_time = draw_time = 0.0
+    dt = 1 / 60
+    for tick in range(ticks):
+        if tick % 60 == 0:
+            wander(actors, rng)
+        start = time.perf_counter()
+        actors.begin_step()
+        actors.update(tilemap, dt)
+        update_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        actors.draw(screen, camera, 0.5, others=(player,))
+        draw_time += time.perf_counter() - start
+
+    print(f"{count} actors, {ticks} ticks")
+    print(f"  update: {update_time * 1000 / ticks:8.3f} ms/tick")
+    print(f"  draw:   {draw_time * 1000 / ticks:8.3f} ms/frame")
+    map_loader.shutdown()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 300,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 600)
@@ -0,0 +1,112 @@
+"""
+Benchmark for Player.move collision handling.
+
+Compares the old loop (check every collision rect, revert the whole move on overlap)
+with the current swept per-axis resolver on a synthetic map full of props.
+Run from the src folder:  python bench_collision.py [props] [ticks]
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # No window needed
+import pygame
+
+import log
+from map import Map
+from player import Player
+
+
+class HeldKeys:
+    """Minimal stand-in for pygame.key.get_pressed()."""
+
+    def __init__(self, held):
+        self.held = held
+
+    def __getitem__(self, key):
+        return key in self.held
+
+
+def build_map(props, tiles=200, seed=1):
+    """Creates a Map with `props` random collision rects on a tiles x tiles grid."""
+    tilemap = Map()
+    tilemap.tile_size = 16
+    tilemap.width = tilemap.height = tiles
+    tilemap.map_pixel_width = tilemap.map_pixel_height = tiles * tilemap.tile_size * tilemap.scale_factor
+    rng = random.Random(seed)
+    tilemap.collision_objects = tuple(
+        pygame.Rect(rng.randrange(tilemap.map_pixel_width), rng.randrange(tilemap.map_pixel_height),
+                    rng.randint(4, 120), rng.randint(4, 120))
+        for _ in range(props)
+    )
+    tilemap.build_spatial_index()
+    tilemap.collision_tiles = bytearray(tilemap.width * tilemap.height)
+    return tilemap
+
+
+def legacy_move(player, keys, collision_rects, dt):
+    """The previous Player.move collision loop: move, scan all rects, revert on overlap."""
+    old_x, old_y = player.pos_x, player.pos_y
+    move_amount = player.speed * dt
+    if keys[pygame.K_w]:
+        player.pos_y -= move_amount
+    if keys[pygame.K_s]:
+        player.pos_y += move_amount
+    if keys[pygame.K_a]:
+        player.pos_x -= move_amount
+    if keys[pygame.K_d]:
+        player.pos_x += move_amount
+    player.rect.x = int(player.pos_x)
+    player.rect.y = int(player.pos_y) + player.collision_offset_y
+    for rect in collision_rects:
+        if player.rect.colliderect(rect):
+            player.pos_x, player.pos_y = old_x, old_y
+            player.rect.x = int(player.pos_x)
+            player.rect.y = int(player.pos_y) + player.collision_offset_y
+            break
+
+
+def make_inputs(ticks, seed=2):
+    """Random walk input: the held keys change every 30 ticks."""
+    rng = random.Random(seed)
+    directions = [pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d]
+    inputs = []
+    held = HeldKeys(set())
+    for tick in range(ticks):
+        if tick % 30 == 0:
+            held = HeldKeys({key for key in directions if rng.random() < 0.4})
+        inputs.append(held)
+    return inputs
+
+
+def run(props, ticks):
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    log.setup("WARNING")  # Even with PIXEL_GAME_LOG_LEVEL=DEBUG, movement logging stays out of the timing
+    tilemap = build_map(props)
+    inputs = make_inputs(ticks)
+    dt = 1 / 60
+    start_x, start_y = tilemap.map_pixel_width / 2, tilemap.map_pixel_height / 2
+
+    player = Player(start_x, start_y, 16, 32)
+    collision_rects = tilemap.get_collision_objects()
+    start = time.perf_counter()
+    for keys in inputs:
+        legacy_move(player, keys, collision_rects, dt)
+    legacy_time = time.perf_counter() - start
+
+    player = Player(start_x, start_y, 16, 32)
+    start = time.perf_counter()
+    for keys in inputs:
+        player.move(keys, tilemap, dt)
+    swept_time = time.perf_counter() - start
+
+    print(f"{props} props, {ticks} ticks")
+    print(f"  legacy linear revert: {legacy_time * 1e6 / ticks:8.2f} us/tick")
+    print(f"  swept grid resolver:  {swept_time * 1e6 / ticks:8.2f} us/tick")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20000)
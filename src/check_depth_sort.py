@@ -0,0 +1,59 @@
+"""
+Checks that depth sorting doesn't change how a map looks without sprites.
+
+Draws every map in the maps folder through draw_map (depth sorted pieces, empty render
+queue) and the way it was drawn before depth sorting (every visible layer tile by tile,
+in Tiled order), at several camera positions, and compares the pixels.
+Run from the src folder:  python check_depth_sort.py [map.tmx ...]
+"""
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # No window needed
+import pygame
+
+import log
+from game import MAP_FOLDER
+from map import Map
+from render_queue import RenderQueue
+
+SCREEN_SIZE = (800, 600)
+
+
+def draw_in_layer_order(tilemap, screen, camera_x, camera_y):
+    size = tilemap.tile_size * tilemap.scale_factor
+    for layer in tilemap.tile_layers:
+        if layer.visible:
+            for x, y, gid in layer:
+                tile = tilemap.scaled_tiles[gid]
+                if tile:
+                    screen.blit(tile, (x * size - camera_x, y * size - camera_y))
+
+
+def check(filename, screen):
+    """Returns the camera positions at which filename looks different, empty if none."""
+    tilemap = Map()
+    tilemap.load_map(os.path.join(MAP_FOLDER, filename))
+    step = tilemap.tile_size * tilemap.scale_factor // 2 + 1  # Not tile aligned
+    cameras = [(x, y) for x in range(-step, tilemap.map_pixel_width, step * 3)
+               for y in range(-step, tilemap.map_pixel_height, step * 3)]
+    expected = pygame.Surface(SCREEN_SIZE)
+    failed = []
+    for camera_x, camera_y in cameras:
+        expected.fill((0, 0, 0))
+        draw_in_layer_order(tilemap, expected, camera_x, camera_y)
+        screen.fill((0, 0, 0))
+        tilemap.draw_map(screen, camera_x, camera_y, None, RenderQueue())
+        if pygame.image.tobytes(screen, "RGB") != pygame.image.tobytes(expected, "RGB"):
+            failed.append((camera_x, camera_y))
+    print(f"{filename}: {len(tilemap.depth_pieces)} depth pieces, {len(cameras)} camera positions, "
+          f"{'OK' if not failed else f'{len(failed)} differ, first at {failed[0]}'}")
+    return failed
+
+
+if __name__ == "__main__":
+    pygame.display.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    log.setup("WARNING")
+    names = sys.argv[1:] or sorted(name for name in os.listdir(MAP_FOLDER) if name.endswith(".tmx"))
+    sys.exit(1 if [name for name in names if check(name, screen)] else 0)
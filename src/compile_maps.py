@@ -0,0 +1,138 @@
+"""
+Offline map compiler: turns TMX maps into binary bundles (map.tmx -> map.mapbin)
+that Map.parse reads without pytmx or XML, see map_bundle.py for the format.
+
+    python compile_maps.py                  # every .tmx under ../assets
+    python compile_maps.py ../assets/maps/map.tmx
+
+Run from the src folder like main.py. A bundle is ignored at runtime as soon as
+its TMX, TSX or tileset images are newer, so forgetting to recompile is safe.
+"""
+import argparse
+import array
+import os
+import sys
+import time
+import xml.etree.ElementTree as ElementTree
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # convert_alpha needs a display, but no window
+import pygame
+import pytmx
+
+from map import TileCache, surface_image_loader
+from map_bundle import TILE_PIXEL_FORMAT, bundle_path, write_bundle
+
+ASSET_FOLDER = "../assets"
+
+
+def plain_properties(properties):
+    """Keeps the JSON-compatible properties (drops pytmx internals like animation frames and colliders)."""
+    return {name: value for name, value in properties.items()
+            if isinstance(value, (str, int, float, bool)) or value is None}
+
+
+def find_dependencies(filename, tmx_data):
+    """Returns the files the map is built from: the TMX, external TSX tilesets and images."""
+    folder = os.path.dirname(filename)
+    dependencies = [filename]
+    for tileset in ElementTree.parse(filename).getroot().iter("tileset"):
+        if tileset.get("source"):
+            dependencies.append(os.path.join(folder, tileset.get("source")))
+    for tileset in tmx_data.tilesets:
+        if tileset.source:
+            dependencies.append(os.path.join(folder, tileset.source))
+    for properties in tmx_data.tile_properties.values():
+        if properties.get("source"):
+            dependencies.append(os.path.join(folder, properties["source"]))
+    return sorted({os.path.normpath(path) for path in dependencies})
+
+
+def compile_map(filename):
+    """Compiles one TMX file into a bundle next to it, returns the bundle path."""
+    tmx_data = pytmx.TiledMap(filename, image_loader=surface_image_loader)
+    blobs = []
+    path = bundle_path(filename)
+    folder = os.path.dirname(path)
+
+    # ✅ Tile layers as packed GID arrays
+    gid_count = len(tmx_data.images)
+    typecode = "H" if gid_count <= 0xFFFF else "I"
+    layers = []
+    for layer in tmx_data.layers:
+        if not isinstance(layer, pytmx.TiledTileLayer):
+            continue
+        gids = array.array(typecode)
+        for row in layer.data:
+            gids.extend(row)
+        layers.append({"name": layer.name, "width": layer.width, "height": layer.height,
+                       "visible": bool(layer.visible), "properties": plain_properties(layer.properties),
+                       "blob": len(blobs)})
+        blobs.append(gids.tobytes())
+
+    # ✅ Every used tile resolved (flips applied) to raw pixels, plus its tile cache key and properties
+    tilesets = sorted(tmx_data.tilesets, key=lambda ts: ts.firstgid, reverse=True)
+    tiles = [None] * gid_count
+    for tiled_gid, gids in tmx_data.gidmap.items():
+        tileset = next((ts for ts in tilesets if tiled_gid >= ts.firstgid), None)
+        for gid, flags in gids:
+            if gid >= gid_count:
+                continue
+            _, index, _ = TileCache.tile_key(filename, tileset, tiled_gid, flags)
+            tile = {"source": None if tileset is None else tileset.source, "index": index,
+                    "flags": [bool(flag) for flag in flags], "blob": None, "size": None,
+                    "properties": plain_properties(tmx_data.get_tile_properties_by_gid(gid) or {})}
+            image = tmx_data.images[gid]
+            if image is not None:
+                tile["blob"], tile["size"] = len(blobs), list(image.get_size())
+                blobs.append(pygame.image.tostring(image.convert_alpha(), TILE_PIXEL_FORMAT))
+            tiles[gid] = tile
+
+    objects = [{"name": obj.name, "x": obj.x, "y": obj.y, "width": obj.width, "height": obj.height,
+                "properties": plain_properties(obj.properties)} for obj in tmx_data.objects]
+
+    meta = {
+        "tile_size": tmx_data.tilewidth,
+        "width": tmx_data.width,
+        "height": tmx_data.height,
+        "byteorder": sys.byteorder,
+        "pixel_format": TILE_PIXEL_FORMAT,
+        "gid_typecode": typecode,
+        "layers": layers,
+        "tiles": tiles,
+        "objects": objects,
+        "dependencies": [os.path.relpath(dependency, folder) for dependency in find_dependencies(filename, tmx_data)],
+    }
+    write_bundle(path, meta, blobs)
+    return path
+
+
+def find_maps(folder):
+    for root, _, files in os.walk(folder):
+        for name in sorted(files):
+            if name.lower().endswith(".tmx"):
+                yield os.path.join(root, name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile TMX maps into binary bundles.")
+    parser.add_argument("maps", nargs="*", help=f"TMX files (default: every .tmx under {ASSET_FOLDER})")
+    args = parser.parse_args()
+
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    failed = 0
+    for filename in args.maps or find_maps(ASSET_FOLDER):
+        start = time.perf_counter()
+        try:
+            path = compile_map(filename)
+        except Exception as error:  # Keep going, a broken map shouldn't stop the others
+            print(f"❌ {filename}: {error}")
+            failed += 1
+            continue
+        print(f"✅ {filename} -> {path} ({os.path.getsize(path) // 1024} KB, "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import pygame
+
+COLLISION_COLOR = (255, 0, 0)  # Red for collidable objects
+TILE_COLOR = (255, 128, 0)  # Orange for blocked tiles of the collision bitmap
+INTERACTIVE_COLOR = (0, 255, 0)  # Green for interactive objects
+EXIT_COLOR = (0, 0, 255)  # Blue for exits
+PLAYER_COLOR = (255, 0, 0)  # Red box (1px border) around the player's collision rect
+
+
+class DebugOverlay:
+    """
+    Debug geometry (collision boxes, blocked tiles, interactive objects, exits, player box).
+    Off by default and toggled at runtime. When visible it is drawn once per frame on top
+    of the map, only the objects inside the viewport are looked up in the map's grids.
+    """
+
+    def __init__(self):
+        self.visible = False
+
+    def toggle(self):
+        self.visible = not self.visible
+
+    def draw(self, screen, tilemap, player, camera_x, camera_y):
+        if not self.visible:
+            return  # Nothing to pay for while hidden
+        view = screen.get_clip().move(camera_x, camera_y)  # Visible part of the map in map pixels
+
+        for rect in tilemap.query_collisions(view):
+            pygame.draw.rect(screen, COLLISION_COLOR, rect.move(-camera_x, -camera_y), 2)
+
+        cell_size = tilemap.tile_size * tilemap.scale_factor
+        first_col, first_row, last_col, last_row = tilemap.get_tile_range(view)
+        for row in range(first_row, last_row + 1):
+            offset = row * tilemap.width
+            for col in range(first_col, last_col + 1):
+                if tilemap.collision_tiles[offset + col]:
+                    tile_rect = (col * cell_size - camera_x, row * cell_size - camera_y, cell_size, cell_size)
+                    pygame.draw.rect(screen, TILE_COLOR, tile_rect, 1)
+
+        for obj in tilemap.query_interactive(view):
+            pygame.draw.rect(screen, INTERACTIVE_COLOR, obj.rect.move(-camera_x, -camera_y), 2)
+
+        for exit_obj in tilemap.query_exits(view):
+            pygame.draw.rect(screen, EXIT_COLOR, exit_obj.rect.move(-camera_x, -camera_y), 2)
+
+        pygame.draw.rect(screen, PLAYER_COLOR, player.rect.move(-camera_x, -camera_y), 1)
+
+
+debug_overlay = DebugOverlay()  # Toggled with F1 in main.py
@@ -0,0 +1,78 @@
+import pygame
+
+
+class DirtyRectRenderer:
+    """
+    Presents a frame with pygame.display.update(rects) instead of a full flip when only
+    some sprites changed.
+
+    Every frame is described by a background key (everything that can change large parts
+    of the screen: map, camera offset, open storage, menu page, ...) and a dict of sprites,
+    name -> (screen rect, content key). If the background key differs from the last
+    presented frame, the whole frame is drawn and flipped. Otherwise only the old and new
+    rects of the sprites that moved or changed are redrawn, each with the screen clip set
+    to it, and only those are sent to the display. A frame where nothing changed costs
+    nothing, idle is then True so the main loop can slow down.
+    """
+
+    def __init__(self):
+        self.background = None
+        self.sprites = {}  # name -> (rect, content key) of the last presented frame
+        self.full_redraw = True
+        self.idle = False
+        self.updated_rects = 0  # Rects sent to the display by the last present()
+
+    def invalidate(self):
+        """Forces a full redraw on the next present(), e.g. while the profiler overlay is shown."""
+        self.full_redraw = True
+
+    def present(self, screen, background, sprites, draw):
+        """
+        Brings the display up to date. draw(screen) draws the whole frame and has to
+        honour the screen's clip rect (blits do that by themselves).
+        """
+        if self.full_redraw or background != self.background:
+            draw(screen)
+            pygame.display.flip()
+            self.background = background
+            self.sprites = sprites
+            self.full_redraw = False
+            self.idle = False
+            self.updated_rects = 1
+            return
+
+        dirty = []
+        for name in sprites.keys() | self.sprites.keys():
+            old, new = self.sprites.get(name), sprites.get(name)
+            if old != new:
+                # ✅ The pixels under the old rect need repairing, the new rect needs drawing
+                dirty.extend(entry[0].inflate(2, 2) for entry in (old, new) if entry and entry[0])
+        self.sprites = sprites
+        self.updated_rects = 0
+        self.idle = not dirty
+        if not dirty:
+            return  # 💤 Nothing changed, the display still shows this frame
+
+        screen_rect = screen.get_rect()
+        updated = []
+        for rect in self.merge(dirty):
+            rect = rect.clip(screen_rect)
+            if rect.width and rect.height:
+                screen.set_clip(rect)
+                draw(screen)
+                updated.append(rect)
+        screen.set_clip(None)
+        pygame.display.update(updated)
+        self.updated_rects = len(updated)
+
+    @staticmethod
+    def merge(rects):
+        """Unites overlapping rects, so no pixel is drawn twice."""
+        merged = []
+        for rect in rects:
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect = rect.union(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+        return merged
@@ -0,0 +1,223 @@
+import hashlib
+import json
+import pygame
+from player import Player, Camera
+from actors import ActorSystem
+from pathfinding import NavGrid
+from production import RECIPES, ProductionEngine
+from inventory import Inventory
+from storage import StorageManager
+from map_loader import map_loader
+from log import get_logger
+
+SIM_DT = 1 / 60  # Fixed simulation step in seconds, independent of the display refresh rate
+KEY_COOLDOWN = 0.5  # Seconds between UI toggles
+PAGE_SWITCH_COOLDOWN = 0.25  # Seconds between menu page switches
+START_MAP = "../assets/maps/map.tmx"
+MAP_FOLDER = "../assets/maps"
+
+logger = get_logger("game")
+
+
+def map_path(target_map):
+    """Turns the target_map property of an exit into the path of the TMX file."""
+    return f"{MAP_FOLDER}/{target_map}"
+
+
+class Game:
+    """
+    Game state and fixed-step simulation (player, map, inventory, storages, UI state).
+    Drawing stays in main.py, so the same Game can run in a window or headless.
+    """
+
+    def __init__(self, width, height, ui_page_count=4):
+        # Load Map, the maps behind its exits keep loading in the background
+        self.tilemap = map_loader.get(START_MAP)
+        self.map_name = START_MAP
+        map_loader.prefetch_exits(self.tilemap, map_path)
+
+        # Game States and Player Setup
+        self.player = Player(300, 250, 16, 32)
+        self.actors = ActorSystem()  # NPCs of the current map
+        self.navigation = NavGrid(self.tilemap)  # NPC pathfinding on the current map
+        self.player_menu_open = False
+        self.current_ui_page = 0  # Index of current visible UI page
+        self.ui_page_count = ui_page_count
+        self.inventory = Inventory()
+        self.inventory.add_item("Wheat", 5)
+        self.inventory.add_item("Flour", 5)
+
+        # Initialize camera
+        self.camera = Camera(width, height)
+        self.camera.set_map_size(self.tilemap.map_pixel_width, self.tilemap.map_pixel_height)
+
+        # Interaction Handling
+        self.key_cooldown = False
+        self.key_cooldown_timer = 0
+        self.ui_open = False  # ✅ Start with UI closed
+        self.current_storage_id = None
+        self.storage_manager = StorageManager()
+        self.sim_time = 0.0  # Seconds of simulated time
+        self.ticks = 0
+        self.production = ProductionEngine()  # Machines of every map, running since the game started
+        self.add_machines()
+
+    def handle_event(self, event):
+        """Handles one user input event (keys and inventory/storage dragging)"""
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_e and not self.key_cooldown:
+                self.key_cooldown = True  # ✅ Set cooldown when key is pressed
+
+        if event.type == pygame.KEYUP:
+            if event.key == pygame.K_e:
+                self.key_cooldown = False  # ✅ Reset cooldown when key is released
+
+        # ✅ Handle Storage UI
+        if self.ui_open and self.current_storage_id:
+            storage = self.storage_manager.get_storage(self.current_storage_id)
+            if storage:
+                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    storage.handle_mouse_click(event.pos, self.inventory)  # ✅ Handle dragging from storage
+                if event.type == pygame.MOUSEBUTTONUP:
+                    storage.handle_mouse_release(event.pos, self.inventory)  # ✅ Drop into inventory
+
+        # ✅ Always allow inventory dragging
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self.inventory.handle_mouse_click(pygame.display.get_surface(), event.pos, True)
+
+        if event.type == pygame.MOUSEBUTTONUP:
+            self.inventory.handle_mouse_release(event.pos)  # ✅ Drop within inventory
+
+    def update(self, keys, dt=SIM_DT):
+        """Advances the game logic (player movement, interactions) by one fixed step of dt seconds"""
+        player = self.player
+        self.sim_time += dt
+        self.ticks += 1
+
+        # ✅ Remember where this step started, drawing interpolates from here
+        player.old_x, player.old_y = player.pos_x, player.pos_y
+        self.actors.begin_step()
+
+        # ✅ Finish the production cycles that are due, on every map
+        self.production.update(self.sim_time)
+
+        # ✅ Reduce cooldown timer
+        if self.key_cooldown_timer > 0:
+            self.key_cooldown_timer -= dt  # Decrease by the elapsed simulation time
+
+        # ✅ Handle UI toggling
+        if self.handle_ui(keys):
+            return  # Stop execution if UI is active
+
+        # Check player interactions
+        for rect, target_map in self.tilemap.query_exits(player.rect):
+            if player.rect.colliderect(rect):  # Player touched an exit
+                logger.info("Transitioning to %s", target_map)
+                self.map_name = map_path(target_map)
+                self.tilemap = map_loader.get(self.map_name)  # Prefetched, normally ready by now
+                map_loader.prefetch_exits(self.tilemap, map_path)
+                # ✅ Update camera size dynamically
+                self.camera.set_map_size(self.tilemap.map_pixel_width, self.tilemap.map_pixel_height)
+                # ✅ Reset player position to start of new map
+                player.pos_x, player.pos_y = 100, 100
+                player.old_x, player.old_y = player.pos_x, player.pos_y  # Don't interpolate across the jump
+                self.actors.clear()  # NPCs belong to the map they were spawned on
+                self.navigation = NavGrid(self.tilemap)
+                self.add_machines()
+                break  # Stop checking other exits
+
+        # ✅ NPCs keep going behind a storage UI, everything stands still behind the player menu
+        if not self.player_menu_open:
+            self.actors.update(self.tilemap, dt)
+
+        # ✅ Disable player movement if UI is open
+        if not self.ui_open and not self.player_menu_open:
+            player.move(keys, self.tilemap, dt)
+
+    def add_machines(self):
+        """
+        Registers the machines of the current map (interactive objects with a "machine"
+        property). They are registered on the first visit but start at sim time 0, so a
+        map's machines have produced the same whenever the player first walks in.
+        """
+        for obj in self.tilemap.interactive_objects:
+            if not obj.machine:
+                continue
+            if obj.machine not in RECIPES:  # Typo in Tiled, don't let it take the transition down
+                logger.warning("⚠️ %s: %s has unknown machine %r, expected one of %s",
+                               self.map_name, obj.name, obj.machine, ", ".join(RECIPES))
+                continue
+            self.production.add_machine(f"{self.map_name}:{obj.name}", obj.machine, self.map_name, start=0.0)
+
+    def handle_ui(self, keys):
+        """Handles UI interactions (opening/closing storage)"""
+        player = self.player
+
+        # Open Player's menu by pressing Tab
+        if keys[pygame.K_TAB] and self.key_cooldown_timer <= 0:
+            if self.player_menu_open:
+                self.player_menu_open = False
+                logger.info("Close player menu")
+            else:
+                self.player_menu_open = True
+                logger.info("Opening player menu")
+                self.current_ui_page = 0  # ✅ Always start on the first page
+            self.key_cooldown_timer = KEY_COOLDOWN
+
+        # Switching menu tabs by pressing q and e
+        if self.player_menu_open and self.key_cooldown_timer <= 0:
+            if keys[pygame.K_q]:
+                self.current_ui_page = (self.current_ui_page - 1) % self.ui_page_count
+                logger.info("⬅️ Switched to UI page %d", self.current_ui_page + 1)
+                self.key_cooldown_timer = PAGE_SWITCH_COOLDOWN  # prevent rapid switching
+
+            elif keys[pygame.K_e]:
+                self.current_ui_page = (self.current_ui_page + 1) % self.ui_page_count
+                logger.info("➡️ Switched to UI page %d", self.current_ui_page + 1)
+                self.key_cooldown_timer = PAGE_SWITCH_COOLDOWN
+
+        # ✅ Close UI when 'E' is pressed
+        if self.ui_open and keys[pygame.K_e] and self.key_cooldown_timer <= 0:
+            logger.info("🔙 Closing UI, returning to game world...")
+            self.ui_open = False
+            self.current_storage_id = None  # ✅ Reset storage tracking
+            self.key_cooldown_timer = KEY_COOLDOWN  # Set cooldown
+            return True  # UI action handled, stop execution
+
+        # ✅ Open UI when interacting with storage
+        for obj in self.tilemap.query_interactive(player.rect):
+            if player.rect.colliderect(obj.rect) and keys[pygame.K_e] and self.key_cooldown_timer <= 0:
+                storage_id = obj.name  # ✅ Get storage name from map
+                storage_slots = obj.slots
+                logger.info("📦 Opening storage UI %s...", storage_id)
+                self.storage_manager.add_storage(storage_id, storage_slots)  # ✅ Ensure storage exists
+                self.current_storage_id = storage_id  # ✅ Set active storage
+                self.ui_open = True
+                self.key_cooldown_timer = KEY_COOLDOWN  # Set cooldown
+                return True  # UI action handled, stop execution
+
+        return False  # No UI actions performed
+
+    def get_state(self):
+        """Returns the simulation state as plain data (used for the replay hash)."""
+        player = self.player
+        state = {
+            "ticks": self.ticks,
+            "map": self.map_name,
+            "player": [repr(player.pos_x), repr(player.pos_y), player.current_direction,
+                       player.current_state, player.current_frame],
+            "inventory": self.inventory.items,
+            "dragging": self.inventory.dragging_item,
+            "storages": {storage_id: storage.items for storage_id, storage in self.storage_manager.storages.items()},
+            "ui": [self.ui_open, self.current_storage_id, self.player_menu_open, self.current_ui_page],
+        }
+        if len(self.production):
+            state["production"] = self.production.get_state()  # Only with machines, like the actors
+        if len(self.actors):
+            state["actors"] = self.actors.get_state()  # Only when there are any, older recordings keep their hash
+        return state
+
+    def state_hash(self):
+        """Returns a SHA-256 of the simulation state, equal hashes mean identical runs."""
+        state = json.dumps(self.get_state(), sort_keys=True)
+        return hashlib.sha256(state.encode("utf-8")).hexdigest()
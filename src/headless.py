@@ -0,0 +1,72 @@
+"""
+Headless simulation: runs the game logic without rendering, as fast as possible.
+
+    python headless.py recording.jsonl          # replay a recording made with main.py --record
+    python headless.py --ticks 216000           # or a seeded random walk (one hour of game time)
+
+Prints the ticks per second and a hash of the final state. The same input always
+gives the same hash, so it doubles as a regression check for game logic.
+Run from the src folder like main.py.
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # No window, nothing is drawn
+import pygame
+
+import log
+from game import Game, SIM_DT
+from replay import ReplayKeys, TRACKED_KEYS, load_recording
+
+WIDTH, HEIGHT = 800, 600  # Same layout as the window, inventory/storage hit tests depend on it
+
+
+def random_walk(ticks, seed):
+    """Generates (keys, events) ticks of a random walk that also presses E/Tab now and then."""
+    rng = random.Random(seed)
+    names = list(TRACKED_KEYS)
+    keys = ReplayKeys()
+    for tick in range(ticks):
+        if tick % 20 == 0:
+            keys = ReplayKeys(TRACKED_KEYS[name] for name in names if rng.random() < 0.25)
+        yield keys, []
+
+
+def run(ticks_source, verbose=False):
+    """Runs the simulation for every tick in ticks_source, returns (game, ticks, seconds)."""
+    pygame.display.init()
+    pygame.display.set_mode((WIDTH, HEIGHT))
+    log.setup("DEBUG" if verbose else "WARNING")
+
+    game = Game(WIDTH, HEIGHT)
+    start = time.perf_counter()
+    ticks = 0
+    for keys, events in ticks_source:
+        for event in events:
+            game.handle_event(event)
+        game.update(keys, SIM_DT)
+        ticks += 1
+    elapsed = time.perf_counter() - start
+    return game, ticks, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the game simulation without a display.")
+    parser.add_argument("recording", nargs="?", help="input recording from main.py --record")
+    parser.add_argument("--ticks", type=int, default=3600, help="random walk length if no recording is given")
+    parser.add_argument("--seed", type=int, default=1, help="random walk seed")
+    parser.add_argument("--verbose", action="store_true", help="keep the game's debug output")
+    args = parser.parse_args()
+
+    source = load_recording(args.recording) if args.recording else random_walk(args.ticks, args.seed)
+    game, ticks, elapsed = run(source, args.verbose)
+
+    print(f"Ticks: {ticks} ({ticks * SIM_DT / 60:.1f} simulated minutes)")
+    print(f"Time: {elapsed:.3f} s, {ticks / elapsed if elapsed else 0:.0f} ticks/s")
+    print(f"State hash: {game.state_hash()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,12 @@
 import pygame
+from assets import acquire_slot_images, registry
+from log import get_logger
+from text_cache import text_cache
+from ui_panel import RetainedPanel
+
+logger = get_logger("inventory")
+
+ITEM_NAMES = ("Wheat", "Flour")
 
 
 class Inventory:
@@ -14,28 +22,49 @@ class Inventory:
         self.slot_height = 32 * 4
         self.padding = 5
 
-        # ✅ Load inventory slot image
-        self.slot_image = pygame.image.load("../assets/ui/inventory_slot.png").convert_alpha()
-        self.slot_image = pygame.transform.scale(self.slot_image, (self.slot_width, self.slot_height))
-
-        # ✅ Load item images (ensure PNGs exist in assets)
-        self.item_images = {
-            "Wheat": pygame.image.load("../assets/items/wheat.png").convert_alpha(),
-            "Flour": pygame.image.load("../assets/items/flour.png").convert_alpha(),
-            # Add more items as needed
-        }
+        # ✅ Slot and item images (scaled to fit inside the slots) are shared with every Storage
+        self.images_key, (self.slot_image, self.item_images) = acquire_slot_images(
+            (self.slot_width, self.slot_height), ITEM_NAMES)
+        self.panel = RetainedPanel()  # The bar is only repainted when the items change
 
-        # ✅ Scale item images to fit inside inventory slots
-        self.item_images = {name: pygame.transform.scale(img, (48, 48)) for name, img in self.item_images.items()}
+    def release(self):
+        """Gives the shared images back to the registry, call when the inventory is thrown away."""
+        registry.release(self.images_key)
 
     def draw(self, screen, font):
         """
         Draws the inventory slots and items on the screen.
+        The bar is kept in a retained panel and only repainted when the items change.
         """
+        rect = self.get_rect(screen)
+        self.panel.draw(screen, rect.topleft, rect.size, self.get_signature(font),
+                        lambda surface: self.draw_slots(surface, font, 0, 0))
+
+        # Draw dragged item
+        if self.dragging_item:
+            mouse_x, mouse_y = pygame.mouse.get_pos()
+            item_image = self.item_images[self.dragging_item["name"]]
+            screen.blit(item_image, (mouse_x - item_image.get_width() // 2, mouse_y - item_image.get_height() // 2))
+
+            # ✅ Draw the quantity slightly below the item
+            text_cache.draw(screen, font, f"x{self.dragging_item['count']}", (0, 0, 0),
+                            (mouse_x + 10, mouse_y + 10))  # Position it near the dragged item
+
+    def get_rect(self, screen):
+        """Screen rect of the slot bar, centered at the bottom of the screen."""
         total_width = (self.slot_width * self.max_items) + (self.padding * (self.max_items - 1)) - 320
         start_x = (screen.get_width() - total_width) // 2  # Centered inventory
         y = screen.get_height() - self.slot_height - 20  # Bottom of the screen
 
+        step = self.slot_width * (2 / 3) + self.padding
+        return pygame.Rect(start_x, y, int((self.max_items - 1) * step) + self.slot_width, self.slot_height)
+
+    def get_signature(self, font):
+        """Everything the slot bar shows, it is repainted when this changes."""
+        return font, tuple(item and (item["name"], item["count"]) for item in self.items)
+
+    def draw_slots(self, screen, font, start_x, y):
+        """Paints the slots, items and counts with the first slot at (start_x, y)."""
         for i in range(self.max_items):
             # Slot background
             x = start_x + i * (self.slot_width * (2/3) + self.padding)
@@ -52,19 +81,7 @@ class Inventory:
                     screen.blit(self.item_images[item["name"]], (item_x, item_y))
 
                     # ✅ Draw item count
-                    item_count = font.render(f"x{item['count']}", True, (0, 0, 0))
-                    screen.blit(item_count, (x + 61, y + 70))  # Adjusted position
-
-        # Draw dragged item
-        if self.dragging_item:
-            mouse_x, mouse_y = pygame.mouse.get_pos()
-            item_image = self.item_images[self.dragging_item["name"]]
-            screen.blit(item_image, (mouse_x - item_image.get_width() // 2, mouse_y - item_image.get_height() // 2))
-
-            # ✅ Draw the quantity slightly below the item
-            item_count = font.render(f"x{self.dragging_item['count']}", True, (0, 0, 0))  # White text
-            screen.blit(item_count, (mouse_x + 10, mouse_y + 10))  # Position it near the dragged item
-
+                    text_cache.draw(screen, font, f"x{item['count']}", (0, 0, 0), (x + 61, y + 70))  # Adjusted position
 
     def add_item(self, name, count):
         """
@@ -125,7 +142,7 @@ class Inventory:
                     self.dragging_item = self.items[i]
                     self.selected_index = i
                     self.items[i] = None  # Remove item from inventory during drag
-                    print(f"Dragging {self.dragging_item}")
+                    logger.debug("Dragging %s", self.dragging_item)
                 return
 
     def handle_mouse_release(self, mouse_pos, target=None):
@@ -134,7 +151,7 @@ class Inventory:
         If a target (e.g., oven) is provided, attempts to drop the item into it.
         """
         if self.dragging_item:
-            print(f"Releasing item: {self.dragging_item}")
+            logger.debug("Releasing item: %s", self.dragging_item)
 
             # 1. Check if item is dropped into another inventory slot
             slot_index = self.get_slot_index(mouse_pos)
@@ -151,14 +168,14 @@ class Inventory:
             elif target:
                 # 2. Try dropping into target (e.g., oven)
                 target.handle_mouse_release(mouse_pos, self)
-                print("Item successfully dropped into target.")
+                logger.debug("Item successfully dropped into target.")
             else:
                 # 3. If drop fails, return the item to ts original slot
                 if self.items[self.selected_index] is None:
                     self.items[self.selected_index] = self.dragging_item
                 else:
                     self.add_item(self.dragging_item["name"], self.dragging_item["count"])
-                    print("Returned item to inventory.")
+                    logger.debug("Returned item to inventory.")
             self.dragging_item = None  # Reset dragging item
             self.selected_index = None  # Reset index
 
@@ -177,7 +194,7 @@ class Inventory:
             slot_rect = pygame.Rect(x, y, slot_width, slot_height)
 
             if slot_rect.collidepoint(mouse_pos):  # Check if mouse is over this slot
-                print(f"Item dropped into slot {i}: {item['name']} x{item['count']}")
+                logger.debug("Item dropped into slot %d: %s x%d", i, item["name"], item["count"])
                 self.add_item(item["name"], item["count"])  # Add the item to the inventory
                 return True
         return False  # Return False if the drop is outside any slot
@@ -0,0 +1,88 @@
+"""
+Leveled, rate-limited logging for the game.
+
+    from log import get_logger
+    logger = get_logger("player")
+    logger.debug("🚧 COLLISION at %s", rect)   # %-style args: nothing is formatted if DEBUG is off
+
+Records go through a queue and are written by a background thread, so a burst of
+log output never blocks a frame. Below WARNING every category is limited to a number
+of records per second (RATE_LIMITS), the rest is counted and reported with the next
+record that gets through. The level comes from setup() or the PIXEL_GAME_LOG_LEVEL
+environment variable (default INFO).
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import time
+
+ROOT_LOGGER = "pixel_game"
+DEFAULT_RATE_LIMIT = 20  # Records per second and category
+RATE_LIMITS = {
+    "camera": 2,
+    "player": 5,
+}
+
+_listener = None
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets at most `limit` records per category through in every one-second window."""
+
+    def __init__(self, limits, default_limit):
+        super().__init__()
+        self.limits = limits
+        self.default_limit = default_limit
+        self.windows = {}  # category -> [window start, records passed, records suppressed]
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True  # Never drop warnings and errors
+
+        category = record.name.rpartition(".")[2]
+        now = time.monotonic()
+        window = self.windows.get(category)
+        if window is None or now - window[0] >= 1.0:
+            if window is not None and window[2]:
+                record.msg = f"{record.msg} (+{window[2]} suppressed)"
+            window = [now, 0, 0]
+            self.windows[category] = window
+
+        if window[1] >= self.limits.get(category, self.default_limit):
+            window[2] += 1
+            return False
+        window[1] += 1
+        return True
+
+
+def setup(level=None):
+    """Configures the game loggers once: queue handler -> rate limit -> background stderr writer."""
+    global _listener
+    root = logging.getLogger(ROOT_LOGGER)
+    if level is not None:
+        root.setLevel(level.upper())
+    if _listener is not None:
+        return
+    if level is None:
+        root.setLevel(os.environ.get("PIXEL_GAME_LOG_LEVEL", "INFO").upper())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(RATE_LIMITS, DEFAULT_RATE_LIMIT))
+    root.addHandler(queue_handler)
+    root.propagate = False
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("[%(levelname)s] %(name)s: %(message)s"))
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)  # Flush what is still queued on exit
+
+
+def get_logger(category):
+    """Returns the logger of a category, e.g. "map", "player", "camera", "ui"."""
+    if _listener is None:
+        setup()
+    return logging.getLogger(f"{ROOT_LOGGER}.{category}")
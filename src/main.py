@@ -1,69 +1,85 @@
+import time
+STARTED = time.perf_counter()  # Before the imports, so the startup report covers them
+import argparse
 import sys
 import pygame
 # from game_objects_old import GameObject, Oven, Well, Mill
-from player import Player, Camera
-from inventory import Inventory
-from storage import Storage, StorageManager
-from map import Map
+from game import Game, SIM_DT
+from map_loader import map_loader
+from pathfinding import path_workers
+from profiler import profiler, startup_report
+from assets import assets
+from debug_overlay import debug_overlay
+from ui_panel import RetainedPanel
+from dirty_rects import DirtyRectRenderer
+from render_queue import RenderQueue
+import log
+from replay import InputRecorder
 import os
 
+startup_report.record("import", (time.perf_counter() - STARTED) * 1000)
+parser = argparse.ArgumentParser(description="Pixel Art Game")
+parser.add_argument("--record", metavar="PATH", help="record the input of every tick for headless.py")
+parser.add_argument("--log-level", help="DEBUG, INFO, WARNING, ... (default: $PIXEL_GAME_LOG_LEVEL or INFO)")
+parser.add_argument("--startup-report", metavar="PATH", help="write the startup time breakdown to PATH (JSON)")
+parser.add_argument("--dirty-rects", action="store_true",
+                    help="only send changed screen areas to the display and slow down while idle")
+args = parser.parse_args()
+log.setup(args.log_level)
+logger = log.get_logger("main")
+
 # Initialize Pygame
+startup_report.start("display")
 pygame.init()
 
 # Screen Setup
 WIDTH, HEIGHT = 800, 600
+MAX_FRAME_TIME = 0.25  # Longer frames are not caught up, so a stall can't snowball
+FPS_LIMIT = 144  # Render cap, rendering may drop frames without slowing the simulation
+IDLE_FPS_LIMIT = 30  # Loop rate of --dirty-rects while nothing on screen changes
+FIRST_FRAME_IMAGES = ("player", "cursor", "inventory_slot", "items/Wheat", "items/Flour")  # Packed before it
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Pixel Art Game")
 clock = pygame.time.Clock()
-cursor_img = pygame.image.load("../assets/ui/cursor.png").convert_alpha()
-cursor_img = pygame.transform.scale(cursor_img, (32, 32))  # Adjust to desired size
+startup_report.stop("display")
+startup_report.start("asset decode")
+assets.load_all(FIRST_FRAME_IMAGES)  # ✅ Only what the first frame shows, the rest follows after it
+cursor_img = assets.get_scaled("cursor", (32, 32))  # Adjust to desired size
+startup_report.stop("asset decode")
 pygame.mouse.set_visible(False)
 
-# Load Map
-tilemap = Map()
-tilemap.load_map("../assets/maps/map.tmx")
-player_ui_maps = [
-    Map(), Map(), Map(), Map()
+# Player menu pages, loaded in the background after the first frame (or on first use)
+UI_PAGES = [
+    "../assets/player_ui.tmx",
+    "../assets/player_ui_2.tmx",
+    "../assets/player_ui_3.tmx",
+    "../assets/player_ui_4.tmx",
 ]
 
-# Load different UI pages
-player_ui_maps[0].load_map("../assets/player_ui.tmx")
-player_ui_maps[1].load_map("../assets/player_ui_2.tmx")
-player_ui_maps[2].load_map("../assets/player_ui_3.tmx")
-player_ui_maps[3].load_map("../assets/player_ui_4.tmx")
-
-current_ui_page = 0  # Index of current visible UI page
-
 
 # Colors and Font
+startup_report.start("fonts")
 WHITE, BLACK, RED = (255, 255, 255), (0, 0, 0), (255, 0, 0)
 font = pygame.font.Font("../assets/ui/pixelfont.ttf", 74)
 small_font = pygame.font.Font("../assets/ui/pixelfont.ttf", 36)
-
-# Game States and Player Setup
-player = Player(300, 250, 16, 32)
-player_menu_open = False
-inventory = Inventory()
-inventory.add_item("Wheat", 5)
-inventory.add_item("Flour", 5)
-
-# Initialize camera
-camera = Camera(WIDTH, HEIGHT)
-camera.set_map_size(tilemap.map_pixel_width, tilemap.map_pixel_height)
-
-# Interaction Handling
-interaction_text = None
-interaction_timer = 0
-key_cooldown = False
-key_cooldown_timer = 0
-interacting_object = None
-global ui_open  # ✅ Track if UI is open
-ui_open = False  # ✅ Start with UI closed
-storage_manager = StorageManager()
-# storage_manager.add_storage("storage_1", max_slots=4)
-
-# Load UI Images
-skills_image = pygame.image.load("../assets/skills.png").convert_alpha()
+debug_font = pygame.font.Font("../assets/ui/pixelfont.ttf", 16)
+startup_report.stop("fonts")
+
+# Game state and simulation (map, player, inventory, storages, camera)
+startup_report.start("game init")
+game = Game(WIDTH, HEIGHT, len(UI_PAGES))
+startup_report.stop("game init")
+for phase, milliseconds in game.tilemap.load_times.items():
+    startup_report.record(f"game init: map {phase} ({game.tilemap.source})", milliseconds)
+recorder = InputRecorder(args.record) if args.record else None
+
+# Dims the world behind the player menu, allocated once
+dim_overlay = pygame.Surface((WIDTH, HEIGHT))
+dim_overlay.set_alpha(180)
+dim_overlay.fill((0, 0, 0))
+menu_panel = RetainedPanel(alpha=False)  # The whole menu frame, see draw_game
+render_queue = RenderQueue()  # Sprites of the frame being drawn, see draw_world
+dirty_renderer = DirtyRectRenderer() if args.dirty_rects else None  # None: full flip every frame
 
 # ui_storage_original = pygame.image.load("../assets/ui/storage_ui.png").convert_alpha()
 
@@ -78,172 +94,192 @@ skills_image = pygame.image.load("../assets/skills.png").convert_alpha()
 # Helper Functions
 def handle_events():
     """Handles all user input events"""
-    global running, key_cooldown
+    global running
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running = False
 
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_e and not key_cooldown:
-                key_cooldown = True  # ✅ Set cooldown when key is pressed
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F1:
+            debug_overlay.toggle()  # ✅ Toggle collision/interaction/exit boxes
 
-        if event.type == pygame.KEYUP:
-            if event.key == pygame.K_e:
-                key_cooldown = False  # ✅ Reset cooldown when key is released
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            profiler.overlay_visible = not profiler.overlay_visible  # ✅ Toggle frame time overlay
 
-        # ✅ Handle Storage UI
-        if ui_open and current_storage_id:
-            storage = storage_manager.get_storage(current_storage_id)
-            if storage:
-                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    storage.handle_mouse_click(pygame.mouse.get_pos(),
-                                               inventory)  # ✅ Handle dragging from storage
-                if event.type == pygame.MOUSEBUTTONUP:
-                    storage.handle_mouse_release(pygame.mouse.get_pos(), inventory)  # ✅ Drop into inventory
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+            stamp = time.strftime("%Y%m%d_%H%M%S")  # ✅ Export the frame time ring buffer
+            profiler.export(f"frame_profile_{stamp}.csv")
+            profiler.export(f"frame_profile_{stamp}.json")
+            logger.info("📊 Exported frame profile frame_profile_%s.csv/.json", stamp)
 
-        # ✅ Always allow inventory dragging
-        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            inventory.handle_mouse_click(screen, pygame.mouse.get_pos(), True)
+        game.handle_event(event)
+        if recorder:
+            recorder.add_event(event)
 
-        if event.type == pygame.MOUSEBUTTONUP:
-            inventory.handle_mouse_release(pygame.mouse.get_pos())  # ✅ Drop within inventory
 
-
-def update_game():
-    """Updates game logic including player movement, interactions, and camera"""
+def update_game(dt):
+    """Advances the game by one fixed step of dt seconds with the currently held keys"""
     keys = pygame.key.get_pressed()
-    dt = min(clock.tick(60) / 1000.0, 1 / 30.0)  # Converts milliseconds to seconds
-
-    collision_rects = tilemap.get_collision_objects()
-    interactive_rects = tilemap.get_interactive_objects()
-    exits = tilemap.get_exits()
-
-    global key_cooldown_timer, ui_open  # ✅ Track if UI is open
-
-    # ✅ Reduce cooldown timer
-    if key_cooldown_timer > 0:
-        key_cooldown_timer -= 1  # Decrease every frame
-
-    # ✅ Handle UI toggling
-    if handle_ui(keys, interactive_rects):
-        return  # Stop execution if UI is active
-
-    # Check player interactions
-    for rect, target_map in exits:
-        if player.rect.colliderect(rect):  # Player touched an exit
-            print(f"Transitioning to {target_map}")
-            tilemap.load_map(f"../assets/maps/{target_map}")  # Load new map
-            # ✅ Update camera size dynamically
-            camera.set_map_size(tilemap.map_pixel_width, tilemap.map_pixel_height)
-            # ✅ Reset player position to start of new map
-            player.pos_x, player.pos_y = 100, 100
-            break  # Stop checking other exits
-
-    # ✅ Disable player movement if UI is open
-    if not ui_open and not player_menu_open:
-        player.move(keys, collision_rects, dt)
-        camera.update(player)
-
-
-def handle_ui(keys, interactive_rects):
-    """Handles UI interactions (opening/closing storage)"""
-
-    global ui_open, key_cooldown_timer, current_storage_id, player_menu_open, current_ui_page
-
-    # Open Player's menu by pressing Tab
-    if keys[pygame.K_TAB] and key_cooldown_timer <= 0:
-        if player_menu_open:
-            player_menu_open = False
-            print("Close player menu")
-        else:
-            player_menu_open = True
-            print("Opening player menu")
-            current_ui_page = 0  # ✅ Always start on the first page
-        key_cooldown_timer = 30
-
-    # Switching menu tabs by pressing q and e
-    if player_menu_open and key_cooldown_timer <= 0:
-        if keys[pygame.K_q]:
-            current_ui_page = (current_ui_page - 1) % len(player_ui_maps)
-            print(f"⬅️ Switched to UI page {current_ui_page + 1}")
-            key_cooldown_timer = 15  # prevent rapid switching
-
-        elif keys[pygame.K_e]:
-            current_ui_page = (current_ui_page + 1) % len(player_ui_maps)
-            print(f"➡️ Switched to UI page {current_ui_page + 1}")
-            key_cooldown_timer = 15
-
-    # ✅ Close UI when 'E' is pressed
-    if ui_open and keys[pygame.K_e] and key_cooldown_timer <= 0:
-        print("🔙 Closing UI, returning to game world...")
-        ui_open = False
-        current_storage_id = None  # ✅ Reset storage tracking
-        key_cooldown_timer = 30  # Set cooldown
-        return True  # UI action handled, stop execution
-
-    # ✅ Open UI when interacting with storage
-    for obj in interactive_rects:
-        if player.rect.colliderect(obj["rect"]) and keys[pygame.K_e] and key_cooldown_timer <= 0:
-            storage_id = obj["name"]  # ✅ Get storage name from map
-            storage_slots = obj["slots"]
-            print("📦 Opening storage UI...")
-            storage_manager.add_storage(storage_id, storage_slots)  # ✅ Ensure storage exists
-            current_storage_id = storage_id  # ✅ Set active storage
-            ui_open = True
-            key_cooldown_timer = 30  # Set cooldown
-            return True  # UI action handled, stop execution
-
-    return False  # No UI actions performed
-
-
-def draw_game():
-    """Handles all drawing operations"""
-    screen.fill(WHITE)
-    screen.set_alpha(180)
+    if recorder:
+        recorder.add_tick(keys)
+    game.update(keys, dt)
+
+
+def draw_world(surface, alpha):
+    """Draws the map, the player, the debug overlay and an open storage"""
+    player, camera = game.player, game.camera
+    surface.fill(WHITE)
 
-    # ✅ Always draw the game world in the background
     camera_x, camera_y = camera.offset_x, camera.offset_y
-    tilemap.draw_map(screen, camera_x, camera_y, camera)
-    player.draw(screen, camera)
+    # ✅ NPCs and the player are depth sorted with the map's furniture by their feet
+    profiler.start("actors.draw")  # Only queueing them, their blits are timed in render_queue.draw
+    render_queue.clear()
+    game.actors.queue_sprites(render_queue, camera, alpha, surface.get_clip())
+    player.queue_sprite(render_queue, camera, alpha)
+    profiler.stop("actors.draw")
+    game.tilemap.draw_map(surface, camera_x, camera_y, camera, render_queue)
+    debug_overlay.draw(surface, game.tilemap, player, camera_x, camera_y)
 
     # ✅ Draw UI on top if active (ignore camera movement)
-    if ui_open and current_storage_id:
+    if game.ui_open and game.current_storage_id:
         # draw_ui_overlay(screen)  # Function to draw UI with PNGs
-        storage_manager.get_storage(current_storage_id).draw(screen, small_font)
-
-    if player_menu_open:
-        # Dim background
-        overlay = pygame.Surface((WIDTH, HEIGHT))
-        overlay.set_alpha(180)
-        overlay.fill((0, 0, 0))
-        screen.blit(overlay, (0, 0))
-
-        # Calculate centered position
-        ui_x = (WIDTH - player_ui_maps[current_ui_page].map_pixel_width) // 2 * (-1)
-        ui_y = (HEIGHT - player_ui_maps[current_ui_page].map_pixel_height) // 2 * (-1)
-
-        # Draw the UI map centered on screen
-        player_ui_maps[current_ui_page].draw_map(screen, ui_x, ui_y, None)
-        if current_ui_page == 0:
-            player.draw_skill_bar(screen, offset=(ui_x, ui_y), font=small_font)
+        profiler.start("storage.draw")
+        game.storage_manager.get_storage(game.current_storage_id).draw(surface, small_font)
+        profiler.stop("storage.draw")
+
+
+def draw_menu(surface, alpha):
+    """Draws the dimmed world with the current player menu page on top"""
+    draw_world(surface, alpha)
+    surface.blit(dim_overlay, (0, 0))
+
+    # Calculate centered position
+    ui_map = map_loader.get(UI_PAGES[game.current_ui_page])  # Waits if the page isn't loaded yet
+    ui_x = (WIDTH - ui_map.map_pixel_width) // 2 * (-1)
+    ui_y = (HEIGHT - ui_map.map_pixel_height) // 2 * (-1)
+
+    # Draw the UI map centered on screen
+    ui_map.draw_map(surface, ui_x, ui_y, None)
+    if game.current_ui_page == 0:
+        game.player.draw_skill_bar(surface, offset=(ui_x, ui_y), font=small_font)
+
+
+def menu_signature(alpha):
+    """Everything the menu frame depends on, the retained frame is repainted when it changes"""
+    player, camera = game.player, game.camera
+    storage = game.storage_manager.get_storage(game.current_storage_id) if game.ui_open else None
+    return (
+        game.current_ui_page, game.tilemap, camera.offset_x, camera.offset_y, debug_overlay.visible,
+        player.get_render_position(alpha), player.current_direction, player.current_state, player.current_frame,
+        tuple(game.actors.get_sprites(camera, alpha).values()),
+        tuple((skill["name"], skill["level"], skill["color"]) for skill in player.skill_level),
+        storage and tuple(item and (item["name"], item["count"]) for item in storage.items),
+    )
+
+
+def world_signature():
+    """Everything besides the sprites that --dirty-rects watches, a change redraws the whole screen"""
+    camera = game.camera
+    storage = game.storage_manager.get_storage(game.current_storage_id) if game.ui_open else None
+    return (
+        game.tilemap, camera.offset_x, camera.offset_y, debug_overlay.visible,
+        storage and tuple(item and (item["name"], item["count"]) for item in storage.items),
+        game.inventory.dragging_item and (dict(game.inventory.dragging_item), pygame.mouse.get_pos()),
+    )
+
+
+def draw_game(alpha):
+    """
+    Handles all drawing operations.
+    alpha (0..1) is how far we are between the last and the next simulation step.
+    """
+    screen.set_alpha(180)
 
+    # ✅ Follow the interpolated player position so the camera moves as smoothly as the player
+    game.camera.update(game.player, alpha)
+
+    if game.player_menu_open:
+        # ✅ Nothing moves while the menu is open, so a static menu frame is a single blit
+        signature = menu_signature(alpha)
+
+        def draw(surface):
+            menu_panel.draw(surface, (0, 0), (WIDTH, HEIGHT), signature, lambda panel: draw_menu(panel, alpha))
+            profiler.draw_overlay(surface, debug_font)
+            # 🛑 No inventory or HUD drawn on top of the menu
+    else:
+        def draw(surface):
+            # ✅ Always draw the game world in the background
+            draw_world(surface, alpha)
+
+            # ✅ Always draw inventory (even in UI mode)
+            profiler.start("inventory.draw")
+            game.inventory.draw(surface, small_font)
+            profiler.stop("inventory.draw")
+            surface.blit(cursor_img, pygame.mouse.get_pos())
+            profiler.draw_overlay(surface, debug_font)
+
+    if dirty_renderer is None:
+        draw(screen)
         pygame.display.flip()
-        return  # 🛑 Stop here — no inventory or HUD drawn underneath
-
-    # ✅ Always draw inventory (even in UI mode)
-    inventory.draw(screen, small_font)
-    mouse_x, mouse_y = pygame.mouse.get_pos()
-    screen.blit(cursor_img, (mouse_x, mouse_y))
-    pygame.display.flip()
-
-
-# Main Game Loop
+        return
+
+    if profiler.overlay_visible or debug_overlay.visible:
+        # The numbers change every frame. The debug boxes can't be redrawn under a clip rect:
+        # pygame.draw.rect outlines the clipped rect, leaving fake edges where the cursor passes
+        dirty_renderer.invalidate()
+    if game.player_menu_open:
+        dirty_renderer.present(screen, ("menu", signature), {}, draw)
+        return
+    player, inventory = game.player, game.inventory
+    sprites = {
+        "player": (player.get_sprite_rect(game.camera, alpha),
+                   (player.current_direction, player.current_state, player.current_frame)),
+        "inventory": (inventory.get_rect(screen), inventory.get_signature(small_font)),
+        "cursor": (cursor_img.get_rect(topleft=pygame.mouse.get_pos()), None),
+    }
+    sprites.update(game.actors.get_sprites(game.camera, alpha))
+    dirty_renderer.present(screen, world_signature(), sprites, draw)
+
+
+# Main Game Loop: fixed simulation steps, rendering as often as the display allows
 running = True
+accumulator = 0.0
 while running:
+    idle = dirty_renderer is not None and dirty_renderer.idle
+    frame_interval = clock.tick(IDLE_FPS_LIMIT if idle else FPS_LIMIT)
+    frame_time = min(frame_interval / 1000.0, MAX_FRAME_TIME)  # Milliseconds to seconds
+    accumulator += frame_time
+
+    profiler.begin_frame()
+    profiler.record("frame_interval", frame_interval)
+    profiler.start("handle_events")
     handle_events()
-    update_game()
-    draw_game()
-
+    profiler.stop("handle_events")
+
+    profiler.start("update_game")
+    while accumulator >= SIM_DT:
+        update_game(SIM_DT)
+        accumulator -= SIM_DT
+    profiler.stop("update_game")
+
+    profiler.start("draw_game")
+    draw_game(accumulator / SIM_DT)
+    profiler.stop("draw_game")
+    profiler.end_frame()
+
+    if startup_report.total is None:
+        # ✅ First frame is on screen: report the startup, then load the menu pages in the background
+        startup_report.finish(STARTED)
+        logger.info("⏱️ Startup:\n%s", "\n".join(startup_report.lines()))
+        if args.startup_report:
+            startup_report.export(args.startup_report)
+        for page in UI_PAGES:
+            map_loader.prefetch(page)
+        assets.load_all()  # The menu's images (skills), before the menu is opened
+
+if recorder:
+    recorder.close()
+map_loader.shutdown()  # Drop prefetches that are still queued
+path_workers.shutdown(cancel_futures=True)
 pygame.quit()
 sys.exit()
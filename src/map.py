@@ -1,128 +1,667 @@
+import array
+import bisect
+import logging
+import os
+import sys
+import time
+from collections import namedtuple
 import pytmx
+import pytmx.util_pygame
 import pygame
-import time  # Import time module for tracking
+from spatial import SpatialGrid
+from map_bundle import BundleError, bundle_path, is_stale, read_bundle
+from profiler import profiler
+from log import get_logger
 
-last_collision_print_time = 0 # Stores the last time we printed collisions
+CHUNK_TILES = 16  # Static tile layers are baked into chunks of 16x16 tiles
 
+logger = get_logger("map")
 
-class Map:
+
+def surface_image_loader(filename, colorkey, **kwargs):
+    """
+    pytmx image loader that only decodes and slices the tileset, like pytmx's
+    pygame loader but without convert(), which needs the display and must run on
+    the main thread. Map.finalize converts the scaled tiles instead.
+    """
+    image = pygame.image.load(filename)
+    if colorkey:
+        image.set_colorkey(pygame.Color(f"#{colorkey}"))
+
+    def load_image(rect=None, flags=None):
+        tile = image.subsurface(rect).copy() if rect else image.copy()
+        if flags:
+            tile = pytmx.util_pygame.handle_transformation(tile, flags)
+        return tile
+
+    return load_image
+
+
+class TileCache:
+    """
+    Keeps every tile scaled exactly once and shares the result between all maps.
+    Tiles are keyed by their tileset image instead of the GID, because the same
+    tileset gets different GIDs in different TMX files. Every committed map holds a
+    reference on its tiles, a tile is dropped when the last map using it is released.
+    """
 
     def __init__(self):
+        self.tiles = {}  # (tileset image, tile index, flags, size) -> scaled surface
+        self.refs = {}  # Same keys -> number of committed maps using the tile
+
+    def build_lookup(self, tmx_data, filename, scaled_tile_size):
+        """Returns (lookup, tiles) for a pytmx map, see scale_tiles()."""
+        tilesets = sorted(tmx_data.tilesets, key=lambda ts: ts.firstgid, reverse=True)
+        entries = []
+        for tiled_gid, gids in tmx_data.gidmap.items():
+            tileset = next((ts for ts in tilesets if tiled_gid >= ts.firstgid), None)
+            for gid, flags in gids:
+                tile = tmx_data.images[gid] if gid < len(tmx_data.images) else None
+                if tile is not None:
+                    entries.append((gid, self.tile_key(filename, tileset, tiled_gid, flags), tile))
+        return self.scale_tiles(entries, len(tmx_data.images), scaled_tile_size)
+
+    @staticmethod
+    def tile_key(filename, tileset, tiled_gid, flags):
+        """Cache key of a tile without its size: (tileset image, tile index, flags)."""
+        if tileset is None or tileset.source is None:
+            return filename, tiled_gid, tuple(flags)  # Not shareable, keep it per map
+        source = os.path.normpath(os.path.join(os.path.dirname(filename), tileset.source))
+        return source, tiled_gid - tileset.firstgid, tuple(flags)
+
+    def scale_tiles(self, entries, gid_count, scaled_tile_size):
+        """
+        Returns (lookup, tiles): a list indexed by GID with the scaled tile surface (or
+        None) and {key: surface} of every tile the map uses, cached or not. entries are
+        (gid, key, unscaled tile). Safe to call from a worker thread, the new tiles are
+        only added to the cache by commit().
+        """
+        lookup = [None] * gid_count
+        tiles = {}
+        size = (scaled_tile_size, scaled_tile_size)
+        for gid, key, tile in entries:
+            key += (size,)
+            scaled_tile = tiles.get(key) or self.tiles.get(key)
+            if scaled_tile is None:
+                scaled_tile = pygame.transform.scale(tile, size)
+            tiles[key] = scaled_tile
+            lookup[gid] = scaled_tile
+        return lookup, tiles
+
+    def commit(self, lookup, tiles):
+        """
+        Main thread only: converts the new tiles for fast blitting, adds them to the
+        cache, takes a reference on all of tiles and returns the lookup with every new
+        tile replaced by its cached version. Returns tiles with the cached versions too,
+        that is what release() gets when the map is dropped.
+        """
+        replace = {}
+        committed = {}
+        for key, tile in tiles.items():
+            # Another map may have committed the same tile meanwhile, or released it since parse()
+            cached = self.tiles.get(key)
+            if cached is None:
+                cached = tile.convert_alpha()
+                self.tiles[key] = cached
+            self.refs[key] = self.refs.get(key, 0) + 1
+            replace[id(tile)] = committed[key] = cached
+        return [replace.get(id(tile), tile) for tile in lookup], committed
+
+    def release(self, tiles):
+        """Drops the references commit() took on tiles, tiles no map uses anymore leave the cache."""
+        for key in tiles:
+            refs = self.refs.get(key, 0) - 1
+            if refs > 0:
+                self.refs[key] = refs
+            else:
+                self.refs.pop(key, None)
+                self.tiles.pop(key, None)
+
+    def memory_size(self):
+        return sum(tile.get_bytesize() * tile.get_width() * tile.get_height() for tile in self.tiles.values())
+
+
+tile_cache = TileCache()  # Shared by all Map instances
+
+# Read-only object tables, built once per load_map
+InteractiveObject = namedtuple("InteractiveObject", ["rect", "name", "slots", "machine"])  # machine: Tiled "machine" property
+Exit = namedtuple("Exit", ["rect", "target_map"])
+# Tiles of one depth_sorted layer that sort together (a piece of furniture), drawn in order of foot_y (bottom edge, map pixels)
+DepthPiece = namedtuple("DepthPiece", ["foot_y", "rect", "surface"])
+
+# Tiled object from a bundle, has the same fields as the pytmx objects the tables are built from
+MapObject = namedtuple("MapObject", ["name", "x", "y", "width", "height", "properties"])
+
+
+class TileLayer:
+    """Tile layer from a bundle, with the parts of pytmx.TiledTileLayer the Map uses."""
+
+    def __init__(self, name, width, height, data, properties, visible):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.data = data  # Rows of GIDs
+        self.properties = properties
+        self.visible = visible
+
+    def __iter__(self):
+        """Yields (x, y, gid) for every cell, like pytmx."""
+        for y, row in enumerate(self.data):
+            for x, gid in enumerate(row):
+                yield x, y, gid
+
+
+class Map:
+
+    def __init__(self, scale_factor=3):
         self.tmx_data = None  # Speichert die Map-Daten
         self.tile_size = 0  # Placeholder, will be set after loading map
-        self.scale_factor = 3
+        self.width = 0  # Map size in tiles
+        self.height = 0
+        self.scale_factor = scale_factor
         self.map_pixel_width = 0
         self.map_pixel_height = 0
         self.is_ui = False
+        self.scaled_tiles = []  # GID -> pre-scaled tile, filled by load_map
+        self.render_layers = []  # (layer, baked chunks or None, profiler section), filled by load_map
+        self.collision_objects = ()  # Tuple of pygame.Rect
+        self.interactive_objects = ()  # Tuple of InteractiveObject
+        self.exits = ()  # Tuple of Exit
+        self.collision_grid = SpatialGrid(1)  # Broadphase grids, rebuilt by load_map
+        self.interactive_grid = SpatialGrid(1)
+        self.exit_grid = SpatialGrid(1)
+        self.collision_tiles = bytearray()  # One byte per tile (1 = blocked), row-major
+        self.nav_blocked = bytearray()  # One byte per tile (1 = not walkable) for pathfinding.py
+        self.filename = None
+        self.tiles = {}  # Tile cache key -> scaled tile of every tile the map uses, committed by finalize()
+        self.tile_layers = []  # All tile layers (pytmx or bundle), hidden ones included
+        self.objects = []  # All Tiled objects, the object tables are built from these
+        self.tile_properties = {}  # GID -> Tiled tile properties
+        self.depth_pieces = ()  # DepthPiece of the depth_sorted layers, sorted by foot_y
+        self.depth_feet = []  # foot_y of every depth piece, for bisecting the visible ones
+        self.depth_reach = 0  # Height of the tallest depth piece
+        self.depth_layer_index = 0  # Render layers drawn below the depth sorted pass, the rest go above
+        self.source = None  # "bundle" or "tmx", whatever parse() read the map from
+        self.load_times = {}  # "parse"/"finalize" -> milliseconds, for the startup report
 
     def load_map(self, filename):
-        self.tmx_data = pytmx.load_pygame(filename, pixelalpha=True)
+        """Loads a map synchronously, see map_loader.py for loading in the background."""
+        self.parse(filename)
+        self.finalize()
+        return self.tmx_data
 
-        # Set tile size AFTER loading the TMX file
-        self.tile_size = self.tmx_data.tilewidth
-        self.map_pixel_width = self.tmx_data.width * self.tile_size * self.scale_factor
-        self.map_pixel_height = self.tmx_data.height * self.tile_size * self.scale_factor
+    def parse(self, filename):
+        """
+        Everything that doesn't need the display: reading the map (from its compiled
+        bundle if there is an up to date one, see compile_maps.py, otherwise the TMX),
+        tile scaling, chunk baking and the object tables. Safe to run on a worker thread.
+        """
+        started = time.perf_counter()
+        self.filename = filename
+        self.source = "bundle"
+        if not self.parse_bundle(bundle_path(filename)):
+            self.source = "tmx"
+            self.parse_tmx(filename)
+        self.map_pixel_width = self.width * self.tile_size * self.scale_factor
+        self.map_pixel_height = self.height * self.tile_size * self.scale_factor
+
+        # ✅ Bake static tile layers into chunks, layers marked "dynamic" in Tiled are drawn tile by tile.
+        # Layers marked "depth_sorted" (furniture) are sorted with the sprites, the layers
+        # before the first of them are drawn below, the ones after it above
+        self.render_layers = []
+        depth_layers = []
+        for layer in self.tile_layers:
+            if not layer.visible:
+                continue
+            if layer.properties.get("depth_sorted"):
+                if not depth_layers:
+                    self.depth_layer_index = len(self.render_layers)
+                depth_layers.append(layer)
+                continue
+            chunks = None if layer.properties.get("dynamic") else self.bake_chunks(layer)
+            self.render_layers.append((layer, chunks, f"{os.path.basename(filename)}/{layer.name}"))
+        if not depth_layers:
+            self.depth_layer_index = len(self.render_layers)
+
+        # ✅ Build the object tables once, they are only replaced by the next load_map
+        self.build_object_tables()
+        self.build_depth_pieces(depth_layers)  # Groups the furniture tiles by collision object
+        self.build_spatial_index()
+        self.build_collision_tiles()
+        self.build_nav_grid()
 
         # ✅ Detect if this is a UI map
         self.is_ui = "_ui" in filename.lower()
+        self.load_times["parse"] = (time.perf_counter() - started) * 1000
 
-        print(
-            f"🗺️ Map Size: {self.map_pixel_width}x{self.map_pixel_height}, Loaded Map: {filename}, Tile Size: {self.tile_size}, | UI Mode: {self.is_ui}")  # Debug
-        return self.tmx_data
+    def parse_tmx(self, filename):
+        """Reads the map through pytmx (XML parse and tileset decode) and scales its tiles."""
+        self.tmx_data = pytmx.TiledMap(filename, image_loader=surface_image_loader)
 
-    def draw_map(self, screen, camera_x, camera_y, camera):  # self und gespeicherte Map-Daten nutzen
-        if self.tmx_data is None:
+        # Set tile size AFTER loading the TMX file
+        self.tile_size = self.tmx_data.tilewidth
+        self.width, self.height = self.tmx_data.width, self.tmx_data.height
+        self.tile_layers = [layer for layer in self.tmx_data.layers if isinstance(layer, pytmx.TiledTileLayer)]
+        self.objects = list(self.tmx_data.objects)
+        self.tile_properties = {}
+        for gid in range(len(self.tmx_data.images)):
+            properties = self.tmx_data.get_tile_properties_by_gid(gid)
+            if properties:
+                self.tile_properties[gid] = properties
+
+        # ✅ Scale every tile once here instead of every frame in draw_map
+        self.scaled_tiles, self.tiles = tile_cache.build_lookup(
+            self.tmx_data, filename, self.tile_size * self.scale_factor)
+
+    def parse_bundle(self, path):
+        """
+        Reads the map from a bundle written by compile_maps.py. The GID arrays and tile
+        pixels are used straight from the memory-mapped file. Returns False if there is
+        no usable bundle, so the caller can fall back to the TMX.
+        """
+        if not os.path.exists(path):
+            return False
+        try:
+            meta, blobs = read_bundle(path)
+        except BundleError as error:
+            logger.warning("⚠️ Ignoring %s", error)
+            return False
+        if is_stale(path, meta):
+            logger.info("Bundle %s is older than its sources, loading the TMX", path)
+            return False
+
+        self.tmx_data = None
+        self.tile_size = meta["tile_size"]
+        self.width, self.height = meta["width"], meta["height"]
+        typecode = meta["gid_typecode"]
+
+        self.tile_layers = []
+        for layer in meta["layers"]:
+            gids = blobs[layer["blob"]].cast(typecode)
+            if meta["byteorder"] != sys.byteorder:
+                gids = array.array(typecode, gids)
+                gids.byteswap()
+            width = layer["width"]
+            rows = [gids[y * width:(y + 1) * width] for y in range(layer["height"])]
+            self.tile_layers.append(TileLayer(layer["name"], width, layer["height"], rows,
+                                              layer["properties"], layer["visible"]))
+
+        self.objects = [MapObject(obj["name"], obj["x"], obj["y"], obj["width"], obj["height"], obj["properties"])
+                        for obj in meta["objects"]]
+
+        entries = []
+        self.tile_properties = {}
+        folder = os.path.dirname(self.filename)
+        for gid, tile in enumerate(meta["tiles"]):
+            if tile is None:
+                continue
+            if tile["properties"]:
+                self.tile_properties[gid] = tile["properties"]
+            if tile["blob"] is None:
+                continue
+            source = self.filename if tile["source"] is None else os.path.normpath(os.path.join(folder, tile["source"]))
+            key = (source, tile["index"], tuple(tile["flags"]))
+            image = pygame.image.frombuffer(blobs[tile["blob"]], tile["size"], meta["pixel_format"])
+            entries.append((gid, key, image))
+
+        # ✅ Scale every tile once here instead of every frame in draw_map
+        self.scaled_tiles, self.tiles = tile_cache.scale_tiles(
+            entries, len(meta["tiles"]), self.tile_size * self.scale_factor)
+        logger.debug("Loaded %s from its bundle", self.filename)
+        return True
+
+    def finalize(self):
+        """Main thread part of loading: converts the tiles and chunks from parse() for the display."""
+        started = time.perf_counter()
+        self.scaled_tiles, self.tiles = tile_cache.commit(self.scaled_tiles, self.tiles)
+        # Chunks that already have the display's alpha format (the usual case) don't need a copy
+        display_masks = pygame.Surface((1, 1), pygame.SRCALPHA).convert_alpha().get_masks()
+        for _, chunks, _ in self.render_layers:
+            for row in chunks or ():
+                for i, chunk in enumerate(row):
+                    if chunk is not None and chunk.get_masks() != display_masks:
+                        row[i] = chunk.convert_alpha()
+        self.depth_pieces = tuple(piece if piece.surface.get_masks() == display_masks
+                                  else piece._replace(surface=piece.surface.convert_alpha())
+                                  for piece in self.depth_pieces)
+        self.load_times["finalize"] = (time.perf_counter() - started) * 1000
+
+        logger.info("🗺️ Map Size: %dx%d, Loaded Map: %s, Tile Size: %d, | UI Mode: %s",
+                    self.map_pixel_width, self.map_pixel_height, self.filename, self.tile_size, self.is_ui)
+
+    def memory_size(self):
+        """
+        Estimated bytes held by this map: baked chunks, depth pieces, scaled and unscaled
+        tiles and the collision bitmaps. Tiles shared with other maps are counted by each.
+        """
+        size = len(self.collision_tiles) + len(self.nav_blocked)
+        size += sum(tile.get_bytesize() * tile.get_width() * tile.get_height() for tile in self.tiles.values())
+        for _, chunks, _ in self.render_layers:
+            for row in chunks or ():
+                size += sum(chunk.get_bytesize() * chunk.get_width() * chunk.get_height()
+                            for chunk in row if chunk is not None)
+        size += sum(piece.surface.get_bytesize() * piece.rect.width * piece.rect.height for piece in self.depth_pieces)
+        if self.tmx_data is not None:
+            size += sum(image.get_bytesize() * image.get_width() * image.get_height()
+                        for image in self.tmx_data.images if image is not None)
+        return size
+
+    def release(self):
+        """Gives this map's tiles back to the tile cache, once the map is no longer cached (see map_loader.py)."""
+        tile_cache.release(self.tiles)
+        self.tiles = {}
+
+    def bake_chunks(self, layer):
+        """
+        Pre-renders a static tile layer into CHUNK_TILES x CHUNK_TILES surfaces.
+        Returns a grid [chunk_row][chunk_col], empty chunks are None.
+        """
+        scaled_tile_size = self.tile_size * self.scale_factor
+        columns = -(-layer.width // CHUNK_TILES)
+        rows = -(-layer.height // CHUNK_TILES)
+        chunks = [[None] * columns for _ in range(rows)]
+
+        for x, y, gid in layer:
+            scaled_tile = self.scaled_tiles[gid]
+            if not scaled_tile:
+                continue
+
+            chunk_x, chunk_y = x // CHUNK_TILES, y // CHUNK_TILES
+            chunk = chunks[chunk_y][chunk_x]
+            if chunk is None:
+                width = min(CHUNK_TILES, layer.width - chunk_x * CHUNK_TILES) * scaled_tile_size
+                height = min(CHUNK_TILES, layer.height - chunk_y * CHUNK_TILES) * scaled_tile_size
+                chunk = pygame.Surface((width, height), pygame.SRCALPHA)
+                chunks[chunk_y][chunk_x] = chunk
+
+            # Every cell is written once onto a transparent chunk, so MAX copies the tile
+            # including its alpha instead of blending it against the empty background
+            chunk.blit(scaled_tile, ((x % CHUNK_TILES) * scaled_tile_size, (y % CHUNK_TILES) * scaled_tile_size),
+                       special_flags=pygame.BLEND_RGBA_MAX)
+        return chunks  # Converted for the display by finalize()
+
+    def build_depth_pieces(self, layers):
+        """
+        Cuts the depth sorted layers into pieces that sort by their foot (bottom edge).
+        Tiles under a collision object belong to that object, and objects whose tiles
+        touch form one group, so a table sorts by its own bottom and not by the wall tiles
+        above it. The other tiles sort on their own, in runs along each row. A group is
+        cut once per layer: its pieces share one foot and are sorted (foot, group, layer
+        order), which keeps the Tiled layer order wherever two layers cover the same cell.
+        """
+        size = self.tile_size * self.scale_factor
+        cells = {(x, y) for layer in layers for x, y, gid in layer if self.scaled_tiles[gid]}
+
+        # Union the collision objects that share a tile, every root is one group
+        parent = list(range(len(self.collision_objects)))
+
+        def find(index):
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        owner = {}  # cell -> index of the first collision object on it
+        for index, rect in enumerate(self.collision_objects):
+            for y in range(max(0, rect.top // size), (rect.bottom - 1) // size + 1):
+                for x in range(max(0, rect.left // size), (rect.right - 1) // size + 1):
+                    if (x, y) in cells:
+                        parent[find(index)] = find(owner.setdefault((x, y), index))
+
+        groups = {}  # group number -> cells
+        for x, y in sorted(cells, key=lambda cell: (cell[1], cell[0])):
+            if (x, y) in owner:
+                group = find(owner[(x, y)])
+            elif (x - 1, y) in cells and (x - 1, y) not in owner:
+                group = run  # Continues the run of free tiles left of it
+            else:
+                run = group = len(parent) + y * self.width + x
+            groups.setdefault(group, []).append((x, y))
+
+        pieces = []
+        for group, group_cells in groups.items():
+            left = min(x for x, _ in group_cells)
+            top = min(y for _, y in group_cells)
+            rect = pygame.Rect(left * size, top * size, (max(x for x, _ in group_cells) + 1 - left) * size,
+                               (max(y for _, y in group_cells) + 1 - top) * size)
+            for order, layer in enumerate(layers):
+                tiles = [(x, y, self.scaled_tiles[layer.data[y][x]]) for x, y in group_cells
+                         if self.scaled_tiles[layer.data[y][x]]]
+                if not tiles:
+                    continue
+                surface = pygame.Surface(rect.size, pygame.SRCALPHA)
+                for x, y, tile in tiles:
+                    # Transparent target, MAX copies the tile like in bake_chunks
+                    surface.blit(tile, ((x - left) * size, (y - top) * size), special_flags=pygame.BLEND_RGBA_MAX)
+                pieces.append((rect.bottom, group, order, DepthPiece(rect.bottom, rect, surface)))
+
+        pieces.sort(key=lambda entry: entry[:3])
+        self.depth_pieces = tuple(entry[3] for entry in pieces)
+        self.depth_feet = [piece.foot_y for piece in self.depth_pieces]
+        self.depth_reach = max((piece.rect.height for piece in self.depth_pieces), default=0)
+
+    def get_visible_pieces(self, screen, camera_y):
+        """Returns the depth pieces that can reach into the screen's clip rect vertically, in draw order."""
+        view = screen.get_clip()
+        first = bisect.bisect_right(self.depth_feet, view.top + camera_y)  # Ending above the view
+        last = bisect.bisect_right(self.depth_feet, view.bottom + camera_y + self.depth_reach)
+        return self.depth_pieces[first:last]
+
+    def get_visible_cells(self, screen, camera_x, camera_y, cell_size, columns, rows):
+        """Returns the (first_col, first_row, last_col, last_row) range of cells inside the screen area."""
+        view = screen.get_clip()  # Whole screen unless a clip rect is set
+        first_col = max(0, int((view.left + camera_x) // cell_size))
+        first_row = max(0, int((view.top + camera_y) // cell_size))
+        last_col = min(columns - 1, int((view.right + camera_x - 1) // cell_size))
+        last_row = min(rows - 1, int((view.bottom + camera_y - 1) // cell_size))
+        return first_col, first_row, last_col, last_row
+
+    def draw_map(self, screen, camera_x, camera_y, camera, render_queue=None):  # self und gespeicherte Map-Daten nutzen
+        """
+        Draws the visible part of the map. The sprites in render_queue (actors, player) are
+        depth sorted with the map's depth pieces, between the layers below and above them.
+        """
+        if self.filename is None:
             return  # Falls keine Map geladen wurde, nichts zeichnen
-        for layer in self.tmx_data.visible_layers:
-            if isinstance(layer, pytmx.TiledTileLayer):
-                for x, y, gid in layer:
-                    tile = self.tmx_data.get_tile_image_by_gid(gid)
-
-                    if tile:  # Ensure the tile exists
-                        original_tile_size = self.tile_size  # Get original tile size
-
-                        scaled_tile_size = original_tile_size * self.scale_factor
-
-                        # Scale the tile properly
-                        scaled_tile = pygame.transform.scale(tile, (scaled_tile_size, scaled_tile_size))
-
+        for index, (layer, chunks, section) in enumerate(self.render_layers):
+            if index == self.depth_layer_index:
+                self.draw_depth_sorted(screen, camera_x, camera_y, render_queue)
+            profiler.start(section)
+            self.draw_layer(screen, layer, chunks, camera_x, camera_y)
+            profiler.stop(section)
+        if self.depth_layer_index == len(self.render_layers):
+            self.draw_depth_sorted(screen, camera_x, camera_y, render_queue)
+        # Collision/interactive/exit boxes are drawn by debug_overlay.py when it is switched on
+
+    def draw_layer(self, screen, layer, chunks, camera_x, camera_y):
+        scaled_tile_size = self.tile_size * self.scale_factor
+        if chunks is not None:
+            # ✅ Only blit the baked chunks that intersect the viewport
+            chunk_pixels = CHUNK_TILES * scaled_tile_size
+            first_col, first_row, last_col, last_row = self.get_visible_cells(
+                screen, camera_x, camera_y, chunk_pixels, len(chunks[0]), len(chunks))
+            for chunk_y in range(first_row, last_row + 1):
+                row = chunks[chunk_y]
+                for chunk_x in range(first_col, last_col + 1):
+                    chunk = row[chunk_x]
+                    if chunk is not None:
+                        screen.blit(chunk, (chunk_x * chunk_pixels - camera_x, chunk_y * chunk_pixels - camera_y))
+
+        else:
+            # Dynamic layer: draw tile by tile, but still only the visible ones
+            first_col, first_row, last_col, last_row = self.get_visible_cells(
+                screen, camera_x, camera_y, scaled_tile_size, layer.width, layer.height)
+            for y in range(first_row, last_row + 1):
+                row = layer.data[y]
+                for x in range(first_col, last_col + 1):
+                    scaled_tile = self.scaled_tiles[row[x]]
+
+                    if scaled_tile:  # Ensure the tile exists
                         # Compute screen position with proper scaling
                         screen_x = x * scaled_tile_size - camera_x
                         screen_y = y * scaled_tile_size - camera_y
 
                         screen.blit(scaled_tile, (screen_x, screen_y))
 
-            # Debug: Draw Collision Boxes
-            for rect in self.get_collision_objects():
-                adjusted_rect = pygame.Rect(rect.x - camera_x, rect.y - camera_y, rect.width, rect.height)
-                pygame.draw.rect(screen, (255, 0, 0), adjusted_rect, 2)  # Red for collidable objects
-
-            for obj in self.get_interactive_objects():
-                adjusted_rect = pygame.Rect(obj["rect"].x - camera_x, obj["rect"].y - camera_y, obj["rect"].width, obj["rect"].height)
-                pygame.draw.rect(screen, (0, 255, 0), adjusted_rect, 2)  # Green for interactive objects
-
-            for rect, _ in self.get_exits():
-                adjusted_rect = pygame.Rect(rect.x - camera_x, rect.y - camera_y, rect.width, rect.height)
-                pygame.draw.rect(screen, (0, 0, 255), adjusted_rect, 2)  # Blue for exits
-
-    def get_collision_objects(self):
-        global last_collision_print_time
-
+    def draw_depth_sorted(self, screen, camera_x, camera_y, render_queue):
+        profiler.start("depth_sorted")
+        pieces = self.get_visible_pieces(screen, camera_y) if self.depth_pieces else ()
+        if render_queue is not None:
+            profiler.start("render_queue.draw")  # The sprites merged with the pieces, has its own column
+            render_queue.draw(screen, pieces, camera_x, camera_y)
+            profiler.stop("render_queue.draw")
+        else:
+            for piece in pieces:
+                screen.blit(piece.surface, (piece.rect.x - camera_x, piece.rect.y - camera_y))
+        profiler.stop("depth_sorted")
+
+    def build_object_tables(self):
+        """Scales all collision, interactive and exit objects once and stores them as tuples."""
         collision_objects = []
-        current_time = time.time()
+        interactive_objects = []
+        exits = []
 
-        for obj in self.tmx_data.objects:
+        for obj in self.objects:
             if obj.properties.get("collidable"):  # Prüfe die Eigenschaft
                 scaled_x = obj.x * self.scale_factor
                 scaled_y = (obj.y + self.tile_size / 2) * self.scale_factor
                 scaled_width = obj.width * self.scale_factor
                 scaled_height = obj.height * self.scale_factor
+                collision_objects.append(pygame.Rect(scaled_x, scaled_y, scaled_width, scaled_height))
 
-                rect = pygame.Rect(scaled_x, scaled_y, scaled_width, scaled_height)
-                collision_objects.append(rect)
-
-        # ✅ Debugging
-        if current_time - last_collision_print_time > 5:
-            print("📌 Collision Objects:")
-            for rect in collision_objects:
-                print(f"   {rect}")
-            last_collision_print_time = current_time
+            if obj.properties.get("interact"):  # Check if it's interactive
+                rect = pygame.Rect(obj.x * self.scale_factor, obj.y * self.scale_factor,
+                                   obj.width * self.scale_factor, obj.height * self.scale_factor)
+                interactive_objects.append(InteractiveObject(rect, obj.name, obj.properties.get("slots", 0),
+                                                             obj.properties.get("machine")))
 
-        return collision_objects
+            if "target_map" in obj.properties:  # If the object has a target_map property
+                rect = pygame.Rect(obj.x * self.scale_factor, obj.y * self.scale_factor,
+                                   obj.width * self.scale_factor, obj.height * self.scale_factor)
+                exits.append(Exit(rect, obj.properties["target_map"]))  # Store the exit rect + target map name
 
-    def get_interactive_objects(self):
-        interactive_objects = []
+        self.collision_objects = tuple(collision_objects)
+        self.interactive_objects = tuple(interactive_objects)
+        self.exits = tuple(exits)
 
-        for obj in self.tmx_data.objects:
-            if obj.properties.get("interact"):  # Check if it's interactive
-                scaled_x = obj.x * self.scale_factor
-                scaled_y = obj.y * self.scale_factor
-                scaled_width = obj.width * self.scale_factor
-                scaled_height = obj.height * self.scale_factor
+        # ✅ Debugging
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📌 Collision Objects:\n%s", "\n".join(f"   {rect}" for rect in self.collision_objects))
+
+    def build_spatial_index(self):
+        """Indexes the object tables in uniform grids with one cell per tile."""
+        cell_size = self.tile_size * self.scale_factor
+        self.collision_grid = SpatialGrid(cell_size)
+        self.interactive_grid = SpatialGrid(cell_size)
+        self.exit_grid = SpatialGrid(cell_size)
+        for rect in self.collision_objects:
+            self.collision_grid.insert(rect, rect)
+        for obj in self.interactive_objects:
+            self.interactive_grid.insert(obj.rect, obj)
+        for exit_obj in self.exits:
+            self.exit_grid.insert(exit_obj.rect, exit_obj)
+
+    def build_collision_tiles(self):
+        """
+        Builds the per-tile collision bitmap. A tile blocks if it sits on a dedicated
+        collision layer (layer property "collision_layer", may be hidden in Tiled) or if
+        the tile itself is marked "collidable" in the tileset.
+        """
+        width = self.width
+        self.collision_tiles = bytearray(width * self.height)
+
+        blocking_gids = {gid for gid, properties in self.tile_properties.items() if properties.get("collidable")}
+
+        for layer in self.tile_layers:
+            whole_layer = bool(layer.properties.get("collision_layer"))
+            if not whole_layer and not blocking_gids:
+                continue
+            for y, row in enumerate(layer.data):
+                offset = y * width
+                for x, gid in enumerate(row):
+                    if gid and (whole_layer or gid in blocking_gids):
+                        self.collision_tiles[offset + x] = 1
+
+    def build_nav_grid(self):
+        """
+        Bakes the walkability grid for pathfinding: blocked tiles plus every tile that a
+        collision object overlaps, even partly, so a path never leads into furniture.
+        """
+        self.nav_blocked = bytearray(self.collision_tiles)
+        for rect in self.collision_objects:
+            first_col, first_row, last_col, last_row = self.get_tile_range(rect)
+            for row in range(first_row, last_row + 1):
+                offset = row * self.width
+                for col in range(first_col, last_col + 1):
+                    self.nav_blocked[offset + col] = 1
+
+    def is_tile_blocked(self, col, row):
+        """Returns True if the tile at (col, row) is blocked. Tiles outside the map never block."""
+        if 0 <= col < self.width and 0 <= row < self.height:
+            return self.collision_tiles[row * self.width + col] == 1
+        return False
+
+    def get_tile_range(self, rect):
+        """Returns the (first_col, first_row, last_col, last_row) tiles under rect, clamped to the map."""
+        cell_size = self.tile_size * self.scale_factor
+        first_col, last_col = max(0, rect.left // cell_size), min(self.width - 1, (rect.right - 1) // cell_size)
+        first_row, last_row = max(0, rect.top // cell_size), min(self.height - 1, (rect.bottom - 1) // cell_size)
+        return first_col, first_row, last_col, last_row
+
+    def rect_hits_tiles(self, rect):
+        """Returns True if rect overlaps any blocked tile of the collision bitmap."""
+        first_col, first_row, last_col, last_row = self.get_tile_range(rect)
+        tiles = self.collision_tiles
+        for row in range(first_row, last_row + 1):
+            offset = row * self.width
+            for col in range(first_col, last_col + 1):
+                if tiles[offset + col]:
+                    return True
+        return False
+
+    def query_blockers(self, rect):
+        """Returns all collision rects and blocked tile rects overlapping rect."""
+        blockers = self.query_collisions(rect)
+        if self.rect_hits_tiles(rect):
+            cell_size = self.tile_size * self.scale_factor
+            first_col, first_row, last_col, last_row = self.get_tile_range(rect)
+            for row in range(first_row, last_row + 1):
+                offset = row * self.width
+                for col in range(first_col, last_col + 1):
+                    if self.collision_tiles[offset + col]:
+                        blockers.append(pygame.Rect(col * cell_size, row * cell_size, cell_size, cell_size))
+        return blockers
 
-                rect = pygame.Rect(scaled_x, scaled_y, scaled_width, scaled_height)
-                interactive_objects.append({"rect": rect, "name": obj.name, "slots": obj.slots})
+    def get_collision_objects(self):
+        """Returns the cached collision rects of the loaded map."""
+        return self.collision_objects
 
-        return interactive_objects
+    def get_interactive_objects(self):
+        """Returns the cached InteractiveObjects (rect, name, slots) of the loaded map."""
+        return self.interactive_objects
 
     def get_exits(self):
-        """Find all exit objects from the map and return them as pygame.Rects with target maps."""
-        exits = []
+        """Returns the cached exits as (rect, target_map) tuples."""
+        return self.exits
 
-        for obj in self.tmx_data.objects:
-            if "target_map" in obj.properties:  # If the object has a target_map property
-                rect = pygame.Rect(obj.x * self.scale_factor, obj.y * self.scale_factor, obj.width * self.scale_factor,
-                                   obj.height * self.scale_factor)
-                exits.append((rect, obj.properties["target_map"]))  # Store the exit rect + target map name
+    def query_collisions(self, rect):
+        """Returns the collision rects overlapping rect."""
+        return self.collision_grid.query(rect)
+
+    def query_interactive(self, rect):
+        """Returns the InteractiveObjects overlapping rect."""
+        return self.interactive_grid.query(rect)
 
-        return exits
+    def query_exits(self, rect):
+        """Returns the Exits overlapping rect."""
+        return self.exit_grid.query(rect)
 
     def draw_ui_layer(self, screen):
         """Draws only UI elements from Tiled on top of the game world"""
-        for layer in self.tmx_data.visible_layers:
-            if "UI" in layer.name:  # ✅ Only render UI layers
+        for layer in self.tile_layers:
+            if layer.visible and "UI" in layer.name:  # ✅ Only render UI layers
                 for x, y, gid in layer:
-                    tile = self.tmx_data.get_tile_image_by_gid(gid)
+                    tile = self.scaled_tiles[gid]
                     if tile:
                         screen.blit(tile, (x * self.tile_size * self.scale_factor,
                                            y * self.tile_size * self.scale_factor))
@@ -0,0 +1,93 @@
+"""
+Binary map bundles, written by compile_maps.py and read by Map.parse.
+
+Layout: header (magic, version, meta length), JSON meta, then the binary blobs,
+each 8-byte aligned. The meta describes the map (size, layers, tiles, objects,
+properties) and points into the blobs by index:
+    - one GID array per tile layer, packed unsigned ints (meta["gid_typecode"])
+    - the resolved pixels of every used tile, raw BGRA (flips already applied),
+      the byte order of pygame's default alpha surfaces, so baking blits need no conversion
+Blob offsets are relative to the start of the data section.
+"""
+import json
+import mmap
+import os
+import struct
+
+MAGIC = b"PXMAP"
+VERSION = 1
+BUNDLE_EXTENSION = ".mapbin"
+HEADER = struct.Struct("<5sB2xI")  # magic, version, padding, meta length
+ALIGNMENT = 8
+TILE_PIXEL_FORMAT = "BGRA"
+
+
+class BundleError(ValueError):
+    """Raised for files that are not a bundle of the current version."""
+
+
+def bundle_path(tmx_path):
+    """map.tmx -> map.mapbin, next to the TMX file."""
+    return os.path.splitext(tmx_path)[0] + BUNDLE_EXTENSION
+
+
+def align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_bundle(path, meta, blobs):
+    """Writes meta (JSON-serializable dict) and the list of bytes-like blobs to path."""
+    offsets = []
+    offset = 0
+    for blob in blobs:
+        offsets.append([offset, len(blob)])
+        offset = align(offset + len(blob))
+    meta = dict(meta, blobs=offsets)
+    meta_bytes = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+    data_start = align(HEADER.size + len(meta_bytes))
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(meta_bytes)))
+        file.write(meta_bytes)
+        file.write(b"\0" * (data_start - HEADER.size - len(meta_bytes)))
+        for blob, (offset, length) in zip(blobs, offsets):
+            file.write(blob)
+            file.write(b"\0" * (align(offset + length) - offset - length))
+
+
+def read_bundle(path):
+    """
+    Memory-maps a bundle. Returns (meta, blobs), where blobs are read-only memoryviews
+    into the mapping, nothing is copied until they are used.
+    """
+    with open(path, "rb") as file:
+        # mmap can't map an empty file, e.g. one left behind by an interrupted compile_maps.py
+        if os.fstat(file.fileno()).st_size < HEADER.size:
+            raise BundleError(f"{path}: truncated bundle")
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)  # Stays valid after close
+
+    magic, version, meta_length = HEADER.unpack_from(mapping)
+    if magic != MAGIC or version != VERSION:
+        raise BundleError(f"{path}: not a version {VERSION} map bundle")
+
+    try:
+        meta = json.loads(mapping[HEADER.size:HEADER.size + meta_length])
+        blob_ranges = [(int(offset), int(length)) for offset, length in meta["blobs"]]
+    except (ValueError, KeyError, TypeError) as error:  # JSONDecodeError and UnicodeDecodeError are ValueErrors
+        raise BundleError(f"{path}: damaged meta data ({error})") from error
+    data = memoryview(mapping)[align(HEADER.size + meta_length):]
+    if any(offset + length > len(data) for offset, length in blob_ranges):
+        raise BundleError(f"{path}: truncated bundle")
+    blobs = [data[offset:offset + length] for offset, length in blob_ranges]
+    return meta, blobs
+
+
+def is_stale(path, meta):
+    """True if a source file of the bundle (TMX, TSX, tileset images) is missing or newer than the bundle."""
+    built = os.path.getmtime(path)
+    folder = os.path.dirname(path)
+    for dependency in meta["dependencies"]:
+        dependency = os.path.join(folder, dependency)
+        if not os.path.exists(dependency) or os.path.getmtime(dependency) > built:
+            return True
+    return False
@@ -0,0 +1,93 @@
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from map import Map, tile_cache
+from log import get_logger
+
+logger = get_logger("map")
+
+DEFAULT_CACHE_BUDGET_MB = 256  # Override with PIXEL_GAME_MAP_CACHE_MB
+
+
+def parse_map(filename, scale_factor):
+    """Worker thread: the display independent part of loading a map."""
+    tilemap = Map(scale_factor)
+    tilemap.parse(filename)
+    return tilemap
+
+
+class MapLoader:
+    """
+    Loads maps on a background thread and keeps the loaded ones in an LRU cache.
+
+    prefetch() starts parsing a map (XML, tileset decode, scaling, chunk baking) while
+    the game keeps running, get() hands out the finished Map and only does the display
+    conversion on the main thread. A map that was never prefetched, or hasn't finished
+    yet, is waited for, so a transition always happens on the same tick (replays stay
+    deterministic), it just might stall.
+
+    Loaded maps are read-only, so going back to a map just returns the cached instance.
+    The least recently used maps are dropped once the cache grows past budget_bytes,
+    together with the scaled tiles (map.tile_cache) that only they used.
+    """
+
+    def __init__(self, budget_bytes=None):
+        if budget_bytes is None:
+            budget_bytes = int(os.environ.get("PIXEL_GAME_MAP_CACHE_MB", DEFAULT_CACHE_BUDGET_MB)) * 1024 * 1024
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="map-loader")
+        self.pending = {}  # (filename, scale_factor) -> Future of a parsed Map
+        self.cache = OrderedDict()  # (filename, scale_factor) -> (Map, bytes), least recently used first
+        self.budget_bytes = budget_bytes
+        self.cache_bytes = 0
+
+    def prefetch(self, filename, scale_factor=3):
+        """Starts loading filename in the background unless it is cached or already on its way."""
+        key = (os.path.normpath(filename), scale_factor)
+        if key not in self.cache and key not in self.pending:
+            logger.debug("Prefetching %s", filename)
+            self.pending[key] = self.executor.submit(parse_map, filename, scale_factor)
+
+    def prefetch_exits(self, tilemap, map_path):
+        """Prefetches the target maps of all exits of tilemap (map_path turns a target_map into a path)."""
+        for exit_obj in tilemap.get_exits():
+            self.prefetch(map_path(exit_obj.target_map), tilemap.scale_factor)
+
+    def get(self, filename, scale_factor=3):
+        """Returns the loaded Map for filename, from the cache or waiting for the worker if needed."""
+        key = (os.path.normpath(filename), scale_factor)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key][0]
+
+        future = self.pending.pop(key, None)
+        if future is None:
+            future = self.executor.submit(parse_map, filename, scale_factor)
+        elif not future.done():
+            logger.debug("Waiting for %s", filename)
+        tilemap = future.result()  # Re-raises errors from the worker
+        tilemap.finalize()
+        self.add_to_cache(key, tilemap)
+        return tilemap
+
+    def add_to_cache(self, key, tilemap):
+        size = tilemap.memory_size()
+        self.cache[key] = (tilemap, size)
+        self.cache_bytes += size
+
+        # Evict least recently used maps, but never the one that was just loaded
+        while self.cache_bytes > self.budget_bytes and len(self.cache) > 1:
+            old_key, (old_map, old_size) = self.cache.popitem(last=False)
+            old_map.release()  # Drops the tiles no cached map shares
+            self.cache_bytes -= old_size
+            logger.debug("Evicted %s from the map cache (%.1f MB), %.1f MB of tiles left", old_key[0],
+                         old_size / 1048576, tile_cache.memory_size() / 1048576)
+
+    def shutdown(self):
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        self.executor.shutdown(wait=True)
+
+
+map_loader = MapLoader()  # Shared by the game and the UI pages
@@ -0,0 +1,237 @@
+"""
+Grid pathfinding for NPCs on the map's collision data.
+
+Map.build_nav_grid bakes one walkability byte per tile at load time (blocked tiles and
+every tile a collision object touches). NavGrid adds movable obstacles on top, answers
+A* queries and caches the paths. Cells are (col, row) tuples, cell_center() turns them
+into map pixels.
+"""
+import heapq
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from log import get_logger
+
+logger = get_logger("pathfinding")
+
+PATH_CACHE_SIZE = 1024  # Cached (start, goal) pairs per NavGrid
+PATH_WORKERS = 2
+
+path_workers = ThreadPoolExecutor(max_workers=PATH_WORKERS, thread_name_prefix="pathfinding")
+
+
+def find_path(blocked, width, height, start, goal):
+    """
+    A* on a 4-connected grid of width x height cells, blocked holds one byte per cell
+    (1 = not walkable). The heuristic is the Manhattan distance. Returns the cells from
+    start to goal, both included, or None if the goal can't be reached. A blocked start
+    is allowed, so an NPC pushed into an obstacle can still walk out.
+    Only reads its arguments, so it is safe on a worker thread with a snapshot of the grid.
+    """
+    goal_x, goal_y = goal
+    if not (0 <= goal_x < width and 0 <= goal_y < height) or blocked[goal_y * width + goal_x]:
+        return None
+    start_x, start_y = start
+    if not (0 <= start_x < width and 0 <= start_y < height):
+        return None
+    start_index, goal_index = start_y * width + start_x, goal_y * width + goal_x
+
+    came_from = {start_index: -1}
+    cost = {start_index: 0}
+    open_heap = [(abs(start_x - goal_x) + abs(start_y - goal_y), 0, start_index)]
+    while open_heap:
+        _, negative_cost, index = heapq.heappop(open_heap)
+        if index == goal_index:
+            path = []
+            while index != -1:
+                path.append((index % width, index // width))
+                index = came_from[index]
+            return tuple(reversed(path))
+        step_cost = -negative_cost
+        if step_cost > cost[index]:
+            continue  # Stale heap entry, a cheaper way here was found later
+
+        x, y = index % width, index // width
+        next_cost = step_cost + 1
+        for neighbour, next_x, next_y in ((index - 1, x - 1, y), (index + 1, x + 1, y),
+                                          (index - width, x, y - 1), (index + width, x, y + 1)):
+            if 0 <= next_x < width and 0 <= next_y < height and not blocked[neighbour]:
+                if next_cost < cost.get(neighbour, next_cost + 1):
+                    cost[neighbour] = next_cost
+                    came_from[neighbour] = index
+                    # Ties go to the deeper node, which expands fewer cells on open floors
+                    heapq.heappush(open_heap, (next_cost + abs(next_x - goal_x) + abs(next_y - goal_y),
+                                               -next_cost, neighbour))
+    return None
+
+
+def find_paths(blocked, width, height, queries):
+    """Worker thread: find_path for a batch of (start, goal) queries."""
+    return {query: find_path(blocked, width, height, *query) for query in queries}
+
+
+class PathBatch:
+    """Queries submitted together by NavGrid.submit(), result() waits for them."""
+
+    def __init__(self, nav_grid, queries, paths, future, version):
+        self.nav_grid = nav_grid
+        self.queries = queries
+        self.paths = paths  # (start, goal) -> path, the cache hits are already in here
+        self.future = future
+        self.version = version  # nav_grid.version the worker's snapshot was taken at
+
+    def done(self):
+        return self.future is None or self.future.done()
+
+    def result(self):
+        """Returns a path (or None) per query, in query order. Waits for the worker if it isn't done."""
+        if self.future is not None:
+            nav_grid = self.nav_grid
+            for query, path in self.future.result().items():
+                if nav_grid.version == self.version:
+                    nav_grid.store(query, path)
+                else:
+                    path = nav_grid.find_path(*query)  # The grid changed under the worker
+                self.paths[query] = path
+            self.future = None
+        return [self.paths[query] for query in self.queries]
+
+
+class NavGrid:
+    """
+    Walkability of one map for pathfinding: the baked Map.nav_blocked plus movable
+    obstacles (set_obstacle). Paths are cached per (start, goal) cell, least recently
+    used ones are dropped after cache_size. When an obstacle moves, only the cached paths
+    through cells it newly blocks are dropped (and the "no path" results once cells free up).
+    """
+
+    def __init__(self, tilemap, cache_size=PATH_CACHE_SIZE):
+        self.width, self.height = tilemap.width, tilemap.height
+        self.cell_size = tilemap.tile_size * tilemap.scale_factor
+        self.static_blocked = bytes(tilemap.nav_blocked)
+        self.blocked = bytearray(tilemap.nav_blocked)
+        self.obstacle_count = array("H", [0]) * len(self.blocked)  # Movable obstacles on each cell
+        self.obstacles = {}  # key -> cell indices covered by that obstacle
+        self.cache = OrderedDict()  # (start, goal) -> path or None, least recently used first
+        self.cell_paths = {}  # cell index -> cache keys of the paths through it
+        self.cache_size = cache_size
+        self.version = 0  # Counts walkability changes
+        self.hits = self.misses = 0
+
+    def cell_at(self, x, y):
+        """Cell under the map pixel (x, y)."""
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def cell_center(self, cell):
+        return (cell[0] + 0.5) * self.cell_size, (cell[1] + 0.5) * self.cell_size
+
+    def is_walkable(self, cell):
+        col, row = cell
+        return 0 <= col < self.width and 0 <= row < self.height and not self.blocked[row * self.width + col]
+
+    def nearest_walkable(self, cell):
+        """Closest walkable cell to cell (breadth first), e.g. the spot in front of a table. None if there is none."""
+        seen = {cell}
+        queue = deque([cell])
+        while queue:
+            current = queue.popleft()
+            if self.is_walkable(current):
+                return current
+            col, row = current
+            for neighbour in ((col + 1, row), (col - 1, row), (col, row + 1), (col, row - 1)):
+                if neighbour not in seen and 0 <= neighbour[0] < self.width and 0 <= neighbour[1] < self.height:
+                    seen.add(neighbour)
+                    queue.append(neighbour)
+        return None
+
+    def find_path(self, start, goal):
+        """Returns the cells from start to goal (or None), from the cache if possible. Runs on the calling thread."""
+        key = (start, goal)
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        self.misses += 1
+        path = find_path(self.blocked, self.width, self.height, start, goal)
+        self.store(key, path)
+        return path
+
+    def submit(self, queries):
+        """
+        Starts a batch of (start, goal) queries. Cache hits are answered right away, the
+        rest runs on the worker pool against a snapshot of the grid. Call result() on the
+        returned PathBatch when the paths are needed, e.g. a tick later.
+        """
+        queries = list(queries)
+        paths = {}
+        missing = []
+        for query in queries:
+            if query in self.cache:
+                self.hits += 1
+                self.cache.move_to_end(query)
+                paths[query] = self.cache[query]
+            elif query not in missing:
+                missing.append(query)
+        future = None
+        if missing:
+            self.misses += len(missing)
+            future = path_workers.submit(find_paths, bytes(self.blocked), self.width, self.height, missing)
+        return PathBatch(self, queries, paths, future, self.version)
+
+    def store(self, key, path):
+        self.cache[key] = path
+        self.cache.move_to_end(key)
+        for col, row in path or ():
+            self.cell_paths.setdefault(row * self.width + col, set()).add(key)
+        while len(self.cache) > self.cache_size:
+            self.forget(next(iter(self.cache)))
+
+    def forget(self, key):
+        path = self.cache.pop(key, None)
+        for col, row in path or ():
+            keys = self.cell_paths.get(row * self.width + col)
+            if keys:
+                keys.discard(key)
+
+    def set_obstacle(self, key, rect):
+        """
+        Places the movable obstacle key (e.g. a cart or a standing NPC) at rect in map
+        pixels, moving it if it was placed before. rect None removes it.
+        """
+        cells = set()
+        if rect is not None and rect.width > 0 and rect.height > 0:
+            size = self.cell_size
+            for row in range(max(0, rect.top // size), min(self.height - 1, (rect.bottom - 1) // size) + 1):
+                for col in range(max(0, rect.left // size), min(self.width - 1, (rect.right - 1) // size) + 1):
+                    cells.add(row * self.width + col)
+        old_cells = self.obstacles.pop(key, set())
+        if cells:
+            self.obstacles[key] = cells
+
+        changed = []
+        for index in old_cells - cells:
+            self.obstacle_count[index] -= 1
+            changed.append(index)
+        for index in cells - old_cells:
+            self.obstacle_count[index] += 1
+            changed.append(index)
+
+        newly_blocked = newly_free = False
+        for index in changed:
+            blocked = 1 if self.static_blocked[index] or self.obstacle_count[index] else 0
+            if blocked == self.blocked[index]:
+                continue
+            self.blocked[index] = blocked
+            if blocked:
+                newly_blocked = True
+                for path_key in list(self.cell_paths.pop(index, ())):
+                    self.forget(path_key)
+            else:
+                newly_free = True
+        if newly_free:
+            # A cell opened up, so targets that were unreachable may be reachable now
+            for path_key in [path_key for path_key, path in self.cache.items() if path is None]:
+                self.forget(path_key)
+        if newly_blocked or newly_free:
+            self.version += 1
@@ -1,9 +1,75 @@
 import pygame
+from types import MappingProxyType
 from inventory import Inventory
+from assets import assets
+from log import get_logger
+from text_cache import text_cache
+
+logger = get_logger("player")
+camera_logger = get_logger("camera")
+
+DIRECTIONS = ("right", "up", "left", "down")  # Blocks of FRAMES_PER_DIRECTION columns, in sheet order
+STATE_ROWS = {"walk": 2, "idle": 1}  # Sheet row of each animation
+FRAMES_PER_DIRECTION = 6
+
+
+def scale_cell(sheet, col, row, width, height, scale_factor):
+    """Cuts cell (col, row) of a grid of width x height cells out of sheet and scales it up."""
+    cell = sheet.subsurface(pygame.Rect(col * width, row * height, width, height))
+    return pygame.transform.scale(cell, (width * scale_factor, height * scale_factor))
+
+
+class SpriteCache:
+    """
+    Scaled animation frames and skill icons, built once per sheet, cell size and scale
+    factor and shared by every Player (or NPC) drawing from the same sheet, so another
+    character costs neither scaling at load time nor memory. The tables are read-only.
+    """
+
+    def __init__(self):
+        self.animations = {}  # (sheet, width, height, scale) -> {direction: {state: frames}}
+        self.icons = {}  # (sheet, width, height, scale) -> icons[row][col]
+
+    def get_animations(self, sheet_name, sprite_width=16, sprite_height=32, scale_factor=3):
+        """Returns {direction: {state: (frame, ...)}} for every direction and state of the sheet."""
+        key = (sheet_name, sprite_width, sprite_height, scale_factor)
+        animations = self.animations.get(key)
+        if animations is None:
+            sheet = assets.get(sheet_name)
+            animations = MappingProxyType({
+                direction: MappingProxyType({
+                    state: tuple(scale_cell(sheet, col, row, sprite_width, sprite_height, scale_factor)
+                                 for col in range(index * FRAMES_PER_DIRECTION, (index + 1) * FRAMES_PER_DIRECTION))
+                    for state, row in STATE_ROWS.items()
+                })
+                for index, direction in enumerate(DIRECTIONS)
+            })
+            self.animations[key] = animations
+            logger.debug("Scaled animation frames of %s x%d", sheet_name, scale_factor)
+        return animations
+
+    def get_icons(self, sheet_name, icon_width, icon_height, scale_factor=3):
+        """Returns icons[row][col], every cell of the sheet scaled up."""
+        key = (sheet_name, icon_width, icon_height, scale_factor)
+        icons = self.icons.get(key)
+        if icons is None:
+            sheet = assets.get(sheet_name)
+            icons = tuple(
+                tuple(scale_cell(sheet, col, row, icon_width, icon_height, scale_factor)
+                      for col in range(sheet.get_width() // icon_width))
+                for row in range(sheet.get_height() // icon_height)
+            )
+            self.icons[key] = icons
+        return icons
+
+
+sprite_cache = SpriteCache()  # Shared by all characters
 
 
 class Player:
-    def __init__(self, x, y, width, height, speed=200, sprite_sheet_path="../assets/player.png"):
+    FRAME_TIME = 1 / 6  # Seconds per animation frame
+
+    def __init__(self, x, y, width, height, speed=200, sprite_sheet_path="player"):
         self.pos_x = float(x)  # Store precise position
         self.pos_y = float(y)
 
@@ -18,37 +84,17 @@ class Player:
         self.rect = pygame.Rect(x, y + self.collision_offset_y, self.collision_width, self.collision_height)
         self.speed = speed
         self.inventory = Inventory()  # Add inventory to the player
-        self.old_x, self.old_y = None, None
+        self.old_x, self.old_y = None, None  # Position at the start of the current simulation step
         self.current_direction = "down"
         self.current_frame = 0
-        self.animation_counter = 0
-
-        # Load the sprite sheet
-        self.sprite_sheet = pygame.image.load(sprite_sheet_path).convert_alpha()
-
-        # Extract individual frames (assuming 4 directions, 3 frames per direction)
-        self.frames = {
-            "right": {
-                "walk": [self.get_sprite(2, i) for i in range(0, 6)],
-                "idle": [self.get_sprite(1, i) for i in range(0, 6)]
-            },
-            "up": {
-                "walk": [self.get_sprite(2, i) for i in range(6, 12)],
-                "idle": [self.get_sprite(1, i) for i in range(6, 12)]
-            },
-            "left": {
-                "walk": [self.get_sprite(2, i) for i in range(12, 18)],
-                "idle": [self.get_sprite(1, i) for i in range(12, 18)]
-            },
-            "down": {
-                "walk": [self.get_sprite(2, i) for i in range(18, 24)],
-                "idle": [self.get_sprite(1, i) for i in range(18, 24)]
-            }
-        }
+        self.animation_timer = 0.0  # Seconds since the last animation frame
+
+        # ✅ Scaled frames from the shared cache (sheet is a registered asset name or a file path)
+        self.frames = sprite_cache.get_animations(sprite_sheet_path)
         self.current_state = "idle"
-        self.skill_sheet = pygame.image.load("../assets/skills.png").convert_alpha()
         self.icon_width = 48
         self.icon_height = 16
+        self.skill_icons = None  # [color][level], loaded by get_skill_icon when the menu first shows them
         self.skill_ui_pos = (200, 300)  # relative to UI
         self.skill_level = [
             {"name": "cooking", "level": 2, "color": 0},
@@ -58,112 +104,150 @@ class Player:
             {"name": "leading", "level": 2, "color": 4}
         ]
 
-    def get_sprite(self, row, col, sprite_height=32, sprite_width=16, scale_factor=3):
-        """ Extracts a sprite from the sprite sheet. """
-
-        x = col * sprite_width
-        y = row * sprite_height
-
-        # Get the original sprite
-        sprite = self.sprite_sheet.subsurface(pygame.Rect(x, y, sprite_width, sprite_height))
-
-        # Scale up the sprite
-        scaled_size = (sprite_width * scale_factor, sprite_height * scale_factor)
-        return pygame.transform.scale(sprite, scaled_size)
-
-    def move(self, keys, collision_rects, dt):
+    def move(self, keys, tilemap, dt):
         """
         Moves the player based on key input.
+        Each axis is swept separately against the map's blockers, so the player stops
+        flush against walls, slides along them and can't tunnel through thin objects.
         """
-        self.old_x, self.old_y = self.pos_x, self.pos_y
+        self.rect.x = int(self.pos_x)  # Position may have been set directly (e.g. map transition)
+        self.rect.y = int(self.pos_y) + self.collision_offset_y
         moving = False  # Track if player is moving
 
         move_amount = self.speed * dt  # ✅ Normalize movement speed using `dt`
+        dx, dy = 0.0, 0.0
 
         if keys[pygame.K_w]:
-            self.pos_y -= move_amount
+            dy -= move_amount
             self.current_direction = "up"
             moving = True
         if keys[pygame.K_s]:
-            self.pos_y += move_amount
+            dy += move_amount
             self.current_direction = "down"
             moving = True
         if keys[pygame.K_a]:
-            self.pos_x -= move_amount
+            dx -= move_amount
             self.current_direction = "left"
             moving = True
         if keys[pygame.K_d]:
-            self.pos_x += move_amount
+            dx += move_amount
             self.current_direction = "right"
             moving = True
 
-        # Convert float positions back to integers for Pygame Rect
+        # Horizontal first, then vertical from the corrected x position
+        self.pos_x = self.sweep_x(tilemap, dx)
         self.rect.x = int(self.pos_x)
+        self.pos_y = self.sweep_y(tilemap, dy)
         self.rect.y = int(self.pos_y) + self.collision_offset_y  # Adjust so it's around the legs
 
-        # Collision check
-        for rect in collision_rects:
-            if self.rect.colliderect(rect):
-                print(f"🚧 COLLISION at {self.rect} with {rect} | Position: ({self.pos_x}, {self.pos_y})")  # Debug print
-                # Revert movement if a collision happens
-                self.pos_x, self.pos_y = self.old_x, self.old_y
-                self.rect.x = int(self.pos_x)
-                self.rect.y = int(self.pos_y) + self.collision_offset_y  # Keep offset
-                break  # Stop checking further collisions
-
-        # Animate if moving
+        # Animate if moving (time based, so the speed doesn't depend on the frame rate)
+        self.animation_timer += dt
         if moving:
-            self.animation_counter += 1
-            if self.animation_counter % 10 == 0:  # Change frame every 10 ticks
+            if self.animation_timer >= self.FRAME_TIME:  # Change frame every FRAME_TIME seconds
+                self.animation_timer -= self.FRAME_TIME
                 self.current_frame = (self.current_frame + 1) % len(self.frames[self.current_direction]["walk"])
             self.current_state = "walk"
         else:
-            self.animation_counter += 1
-            if self.animation_counter % 10 == 0:  # slower idle animation
+            if self.animation_timer >= self.FRAME_TIME:  # slower idle animation
+                self.animation_timer -= self.FRAME_TIME
                 self.current_frame = (self.current_frame + 1) % len(self.frames[self.current_direction]["idle"])
             self.current_state = "idle"
 
-    def draw(self, screen, camera):
-        """ Draws the current sprite on screen. """
+    def get_render_position(self, alpha=1.0):
+        """Interpolates between the previous and the current simulation step for drawing."""
+        if self.old_x is None:
+            return self.pos_x, self.pos_y
+        return (self.old_x + (self.pos_x - self.old_x) * alpha,
+                self.old_y + (self.pos_y - self.old_y) * alpha)
+
+    def sweep_x(self, tilemap, dx):
+        """Returns the new pos_x after moving dx, clamped at the first blocker along the way."""
+        target_x = self.pos_x + dx
+        rect = self.rect
+        if dx > 0:
+            swept = pygame.Rect(rect.right, rect.top, int(target_x) + rect.width - rect.right, rect.height)
+            if swept.width > 0:
+                # Only blockers ahead of the player count, so it can still walk out of an overlap
+                for blocker in tilemap.query_blockers(swept):
+                    if blocker.left >= rect.right and blocker.left - rect.width < target_x:
+                        target_x = blocker.left - rect.width
+                        logger.debug("🚧 COLLISION at %s with %s | Position: (%s, %s)", rect, blocker, self.pos_x, self.pos_y)
+        elif dx < 0:
+            swept = pygame.Rect(int(target_x), rect.top, rect.left - int(target_x), rect.height)
+            if swept.width > 0:
+                for blocker in tilemap.query_blockers(swept):
+                    if blocker.right <= rect.left and blocker.right > target_x:
+                        target_x = blocker.right
+                        logger.debug("🚧 COLLISION at %s with %s | Position: (%s, %s)", rect, blocker, self.pos_x, self.pos_y)
+        return target_x
+
+    def sweep_y(self, tilemap, dy):
+        """Returns the new pos_y after moving dy, clamped at the first blocker along the way."""
+        target_y = self.pos_y + dy
+        rect = self.rect
+        target_top = int(target_y) + self.collision_offset_y
+        if dy > 0:
+            swept = pygame.Rect(rect.left, rect.bottom, rect.width, target_top + rect.height - rect.bottom)
+            if swept.height > 0:
+                for blocker in tilemap.query_blockers(swept):
+                    if blocker.top >= rect.bottom and blocker.top - rect.height - self.collision_offset_y < target_y:
+                        target_y = blocker.top - rect.height - self.collision_offset_y
+                        logger.debug("🚧 COLLISION at %s with %s | Position: (%s, %s)", rect, blocker, self.pos_x, self.pos_y)
+        elif dy < 0:
+            swept = pygame.Rect(rect.left, target_top, rect.width, rect.top - target_top)
+            if swept.height > 0:
+                for blocker in tilemap.query_blockers(swept):
+                    if blocker.bottom <= rect.top and blocker.bottom - self.collision_offset_y > target_y:
+                        target_y = blocker.bottom - self.collision_offset_y
+                        logger.debug("🚧 COLLISION at %s with %s | Position: (%s, %s)", rect, blocker, self.pos_x, self.pos_y)
+        return target_y
+
+    def draw(self, screen, camera, alpha=1.0):
+        """ Draws the current sprite on screen, interpolated between simulation steps by alpha. """
         current_sprite = self.frames[self.current_direction][self.current_state][self.current_frame]
+        pos_x, pos_y = self.get_render_position(alpha)
 
         if camera.fixed_camera:
             # ✅ If map is small, draw player at actual position
-            screen_x = round(self.pos_x) - camera.offset_x
-            screen_y = round(self.pos_y) - camera.offset_y
+            screen_x = round(pos_x) - camera.offset_x
+            screen_y = round(pos_y) - camera.offset_y
         else:
             # ✅ If map is large, keep player centered on screen
-            screen_x = round(self.pos_x) - camera.offset_x  # screen.get_width() // 2 - current_sprite.get_width() // 2
-            screen_y = round(self.pos_y) - camera.offset_y  # screen.get_height() // 2 - current_sprite.get_height() // 2
+            screen_x = round(pos_x) - camera.offset_x  # screen.get_width() // 2 - current_sprite.get_width() // 2
+            screen_y = round(pos_y) - camera.offset_y  # screen.get_height() // 2 - current_sprite.get_height() // 2
 
         screen.blit(current_sprite, (screen_x, screen_y))
 
-        # ✅ Draw collision box from self.rect
-        debug_rect = camera.apply(self.rect)  # Adjust collision box based on camera movement
+    def get_sprite_rect(self, camera, alpha=1.0):
+        """Screen rect draw() covers, blit positions are truncated the same way."""
+        current_sprite = self.frames[self.current_direction][self.current_state][self.current_frame]
+        pos_x, pos_y = self.get_render_position(alpha)
+        screen_x = round(pos_x) - camera.offset_x
+        screen_y = round(pos_y) - camera.offset_y
+        return pygame.Rect(int(screen_x), int(screen_y), current_sprite.get_width(), current_sprite.get_height())
 
-        # Debug: Draw the correctly aligned collision box
-        pygame.draw.rect(screen, (255, 0, 0), debug_rect, 1)  # Red box (1px border)
+    def queue_sprite(self, render_queue, camera, alpha=1.0):
+        """Adds the current sprite to render_queue instead of drawing it, sorted by the player's feet."""
+        rect = self.get_sprite_rect(camera, alpha)
+        sprite = self.frames[self.current_direction][self.current_state][self.current_frame]
+        render_queue.add(rect.bottom + camera.offset_y, sprite, rect.topleft)
 
     def get_skill_icon(self, col, row):
-        rect = pygame.Rect(col * self.icon_width, row * self.icon_height,
-                           self.icon_width, self.icon_height)
-        return self.skill_sheet.subsurface(rect)
+        """Returns the scaled icon of level col in color row."""
+        if self.skill_icons is None:
+            self.skill_icons = sprite_cache.get_icons("skills", self.icon_width, self.icon_height)
+        return self.skill_icons[row][col]
 
     def draw_skill_bar(self, screen, offset=(0, 0), font=None):
         x_base, y_base = self.skill_ui_pos[0] + offset[0], self.skill_ui_pos[1] + offset[1]
         for i, skill in enumerate(self.skill_level):
-            icon = self.get_skill_icon(skill["level"], skill["color"])
             x = x_base
             y = y_base + i * (self.icon_height + 30)
-            # 🖼 scale the icon before blitting
-            scaled_icon = pygame.transform.scale(
-                icon,
-                (self.icon_width * 3, self.icon_height * 3)
-            )
-            screen.blit(scaled_icon, (x, y))
+            # 🖼 Icons are scaled once by the sprite cache
+            screen.blit(self.get_skill_icon(skill["level"], skill["color"]), (x, y))
 
             if font:
-                label = font.render(skill["name"], True, (0, 0, 0))  # white text
+                label = text_cache.render(font, skill["name"], (0, 0, 0))  # Rendered once, then cached
                 screen.blit(label, (x + self.icon_width * 3 + 15, y + 5))
 
 
@@ -190,16 +274,19 @@ class Camera:
         else:
             self.fixed_camera = False
 
-    def update(self, player):
+    def update(self, player, alpha=1.0):
         """
         Updates the camera position based on the player.
         - Keeps the player centered if the map is large.
         - Allows free movement if the map is small.
+        alpha interpolates the player position between simulation steps.
         """
-        print(f"📌 Player: ({player.pos_x}, {player.pos_y}) | Camera Offset: ({self.offset_x}, {self.offset_y})")
+        camera_logger.debug("📌 Player: (%s, %s) | Camera Offset: (%s, %s)",
+                            player.pos_x, player.pos_y, self.offset_x, self.offset_y)
         if not self.fixed_camera:
-            target_x = player.pos_x - self.width // 2
-            target_y = player.pos_y - self.height // 2
+            pos_x, pos_y = player.get_render_position(alpha)
+            target_x = pos_x - self.width // 2
+            target_y = pos_y - self.height // 2
             self.offset_x = max(0, min(target_x, self.map_width - self.width))
             self.offset_y = max(0, min(target_y, self.map_height - self.height))
 
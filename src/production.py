@@ -0,0 +1,139 @@
+import heapq
+import itertools
+from collections import namedtuple
+
+from log import get_logger
+
+logger = get_logger("production")
+
+# inputs and outputs are ((item name, count), ...), duration is in simulated seconds
+Recipe = namedtuple("Recipe", ["inputs", "outputs", "duration"])
+
+RECIPES = {
+    "Well": Recipe((), (("Water", 1),), 100 / 60),  # The old 100 frame loading bar at 60 FPS
+    "Mill": Recipe((("Wheat", 1),), (("Flour", 1),), 3.0),
+    "Oven": Recipe((("Flour", 1), ("Water", 1)), (("Bread", 1),), 6.0),
+}
+MAX_STACK = 99  # A machine stops when an output reaches this many items
+
+
+class Machine:
+    """One Well, Mill or Oven: its input and output buffers and the cycle in progress."""
+
+    def __init__(self, machine_id, kind, map_name=None):
+        self.machine_id = machine_id
+        self.kind = kind
+        self.recipe = RECIPES[kind]
+        self.map_name = map_name
+        self.inputs = {name: 0 for name, _ in self.recipe.inputs}
+        self.outputs = {name: 0 for name, _ in self.recipe.outputs}
+        self.started_at = None  # Sim time the running cycle started, None while idle
+        self.done_at = None  # Sim time the running cycle completes
+        self.event = None  # Sequence number of the scheduled completion, stale events don't match
+
+    def progress(self, now):
+        """0..1 of the running cycle, e.g. for a loading bar."""
+        if self.done_at is None:
+            return 0.0
+        return min(1.0, (now - self.started_at) / (self.done_at - self.started_at))
+
+    def can_start(self):
+        return (all(self.inputs[name] >= count for name, count in self.recipe.inputs)
+                and all(self.outputs[name] + count <= MAX_STACK for name, count in self.recipe.outputs))
+
+
+class ProductionEngine:
+    """
+    Runs every machine on the simulation clock, whether its map is loaded, its interface
+    open or not. Machines don't tick: starting a cycle schedules its completion time on a
+    heap, and update(now) only pops the completions that are due. Between completions a
+    thousand machines cost a single heap peek per step.
+
+    A cycle that completes starts the next one at its completion time, not at now, so a
+    long step (or catching up after a stall) produces exactly what small steps would.
+    That is also how a machine registered late catches up, see add_machine().
+    """
+
+    def __init__(self):
+        self.machines = {}  # machine_id -> Machine
+        self.events = []  # (completion time, sequence, machine_id)
+        self.sequence = itertools.count()
+        self.now = 0.0
+
+    def __len__(self):
+        return len(self.machines)
+
+    def add_machine(self, machine_id, kind, map_name=None, start=None):
+        """
+        Registers a machine (once, later calls return the existing one) and starts it if
+        it can run. start is the sim time the machine has been running since (default:
+        now), the cycles it would have completed since then are produced right away.
+        """
+        machine = self.machines.get(machine_id)
+        if machine is None:
+            machine = Machine(machine_id, kind, map_name)
+            self.machines[machine_id] = machine
+            if self.try_start(machine, self.now if start is None else min(start, self.now)):
+                self.update(self.now)  # Catch up, update() chains the cycles from start
+        return machine
+
+    def remove_machine(self, machine_id):
+        self.machines.pop(machine_id, None)  # Its scheduled event is skipped when it comes up
+
+    def get_machine(self, machine_id):
+        return self.machines.get(machine_id)
+
+    def insert(self, machine_id, name, count):
+        """Puts count of item name into a machine's input, returns how many it took."""
+        machine = self.machines[machine_id]
+        if name not in machine.inputs:
+            return 0
+        count = max(0, min(count, MAX_STACK - machine.inputs[name]))
+        machine.inputs[name] += count
+        if count and machine.done_at is None:
+            self.try_start(machine, self.now)
+        return count
+
+    def take(self, machine_id, name, count=None):
+        """Removes up to count (default: all) of item name from a machine's output, returns how many."""
+        machine = self.machines[machine_id]
+        available = machine.outputs.get(name, 0)
+        count = available if count is None else max(0, min(count, available))
+        if count:
+            machine.outputs[name] -= count
+            if machine.done_at is None:
+                self.try_start(machine, self.now)  # It may have stopped on a full output
+        return count
+
+    def try_start(self, machine, at):
+        """Starts a cycle at sim time at if the inputs are there and the outputs have room."""
+        if not machine.can_start():
+            return False
+        recipe = machine.recipe
+        for name, count in recipe.inputs:
+            machine.inputs[name] -= count
+        machine.started_at = at
+        machine.done_at = at + recipe.duration
+        machine.event = next(self.sequence)
+        heapq.heappush(self.events, (machine.done_at, machine.event, machine.machine_id))
+        return True
+
+    def update(self, now):
+        """Completes every cycle that is due by sim time now."""
+        self.now = now
+        events = self.events
+        while events and events[0][0] <= now:
+            done_at, event, machine_id = heapq.heappop(events)
+            machine = self.machines.get(machine_id)
+            if machine is None or machine.event != event:
+                continue  # Removed machine
+            for name, count in machine.recipe.outputs:
+                machine.outputs[name] += count
+            machine.started_at = machine.done_at = machine.event = None
+            logger.debug("%s finished a cycle at %.2f s", machine_id, done_at)
+            self.try_start(machine, done_at)
+
+    def get_state(self):
+        """Buffers and running cycles of all machines as plain data (for the replay hash)."""
+        return {machine_id: [machine.kind, machine.inputs, machine.outputs, repr(machine.done_at)]
+                for machine_id, machine in self.machines.items()}
@@ -0,0 +1,136 @@
+import csv
+import json
+import time
+from collections import deque
+
+import pygame
+
+
+class FrameProfiler:
+    """
+    Per-frame timing counters for the game's subsystems.
+    Every frame is one dict {section: milliseconds}, the last `history` frames are kept
+    in a ring buffer. Sections are timed with start()/stop() around the code to measure.
+    """
+
+    def __init__(self, history=600):
+        self.frames = deque(maxlen=history)  # Ring buffer of finished frames
+        self.current = {}  # Section times of the frame in progress
+        self.starts = {}  # Section name -> perf_counter() at start()
+        self.frame_start = None
+        self.overlay_visible = False
+
+    def begin_frame(self):
+        self.current = {}
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        """Closes the current frame and stores it in the ring buffer."""
+        if self.frame_start is None:
+            return
+        self.current["frame"] = (time.perf_counter() - self.frame_start) * 1000
+        self.frames.append(self.current)
+        self.frame_start = None
+
+    def start(self, name):
+        self.starts[name] = time.perf_counter()
+
+    def stop(self, name):
+        """Adds the time since start(name) to the section, repeated sections are summed per frame."""
+        elapsed = (time.perf_counter() - self.starts.pop(name)) * 1000
+        self.current[name] = self.current.get(name, 0.0) + elapsed
+
+    def record(self, name, milliseconds):
+        """Stores an externally measured value (e.g. the clock interval) for this frame."""
+        self.current[name] = milliseconds
+
+    def section_names(self):
+        names = []
+        for frame in self.frames:
+            for name in frame:
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def percentiles(self, name, points=(50, 95, 99)):
+        """Returns the given percentiles (ms) of a section over the buffered frames."""
+        values = sorted(frame[name] for frame in self.frames if name in frame)
+        if not values:
+            return tuple(0.0 for _ in points)
+        return tuple(values[min(len(values) - 1, int(len(values) * point / 100))] for point in points)
+
+    def draw_overlay(self, screen, font):
+        """Draws p50/p95/p99 of the frame and every section in the top left corner."""
+        if not self.overlay_visible or not self.frames:
+            return
+        lines = [f"{'section':<26} {'p50':>6} {'p95':>6} {'p99':>6} ms"]
+        for name in self.section_names():
+            p50, p95, p99 = self.percentiles(name)
+            lines.append(f"{name[:26]:<26} {p50:6.2f} {p95:6.2f} {p99:6.2f}")
+
+        labels = [font.render(line, True, (255, 255, 255)) for line in lines]
+        line_height = font.get_linesize()
+        background = pygame.Surface((max(label.get_width() for label in labels) + 10, line_height * len(lines) + 10))
+        background.set_alpha(200)
+        background.fill((0, 0, 0))
+        screen.blit(background, (5, 5))
+        for i, label in enumerate(labels):
+            screen.blit(label, (10, 10 + i * line_height))
+
+    def export(self, path):
+        """Writes the buffered frames to path, as JSON if it ends with .json, otherwise CSV."""
+        names = self.section_names()
+        if path.endswith(".json"):
+            summary = {name: dict(zip(("p50", "p95", "p99"), self.percentiles(name))) for name in names}
+            with open(path, "w") as file:
+                json.dump({"frames": list(self.frames), "summary": summary}, file, indent=1)
+            return
+
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["frame_index"] + names)
+            for index, frame in enumerate(self.frames):
+                writer.writerow([index] + [f"{frame[name]:.4f}" if name in frame else "" for name in names])
+
+
+class StartupReport:
+    """
+    Where the time before the first frame goes (imports, display, asset decode, map parse,
+    ...). Phases are timed with start()/stop() or recorded from measurements taken
+    elsewhere, finish() closes the report once the first frame is on screen.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.phases = {}  # name -> milliseconds, in the order they were first seen
+        self.starts = {}
+        self.total = None
+
+    def start(self, name):
+        self.starts[name] = time.perf_counter()
+
+    def stop(self, name):
+        elapsed = (time.perf_counter() - self.starts.pop(name)) * 1000
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def record(self, name, milliseconds):
+        self.phases[name] = self.phases.get(name, 0.0) + milliseconds
+
+    def finish(self, origin=None):
+        """Stores the time from origin (perf_counter(), default: creation of the report) until now."""
+        self.total = (time.perf_counter() - (self.origin if origin is None else origin)) * 1000
+
+    def lines(self):
+        lines = [f"{name:<34} {milliseconds:8.1f} ms" for name, milliseconds in self.phases.items()]
+        if self.total is not None:
+            lines.append(f"{'total (to first frame)':<34} {self.total:8.1f} ms")
+        return lines
+
+    def export(self, path):
+        """Writes the report as JSON, so cold starts of different builds can be compared."""
+        with open(path, "w") as file:
+            json.dump({"phases": self.phases, "total": self.total}, file, indent=1)
+
+
+profiler = FrameProfiler()  # Shared by all modules
+startup_report = StartupReport()  # Filled by main.py and the loaders it calls
@@ -0,0 +1,35 @@
+from operator import itemgetter
+
+
+class RenderQueue:
+    """
+    The moving sprites of one frame (actors, player), drawn back to front by their feet.
+    Only these are sorted every frame: the map's depth pieces are sorted once at load
+    (Map.depth_pieces) and draw() merges the two sorted sequences in a single pass.
+    On equal feet the map piece is drawn first, so a sprite standing at a piece's base
+    is in front of it.
+    """
+
+    def __init__(self):
+        self.entries = []  # (foot_y in map pixels, insertion order, surface, screen position)
+
+    def clear(self):
+        self.entries.clear()
+
+    def add(self, foot_y, surface, position):
+        """Queues surface at screen position, sorted by foot_y (map pixels, usually the sprite's bottom)."""
+        self.entries.append((foot_y, len(self.entries), surface, position))
+
+    def draw(self, screen, pieces=(), camera_x=0, camera_y=0):
+        """Draws the queued sprites with pieces (DepthPiece, sorted by foot_y) merged in."""
+        self.entries.sort(key=itemgetter(0, 1))
+        pieces = iter(pieces)
+        piece = next(pieces, None)
+        for foot_y, _, surface, position in self.entries:
+            while piece is not None and piece.foot_y <= foot_y:
+                screen.blit(piece.surface, (piece.rect.x - camera_x, piece.rect.y - camera_y))
+                piece = next(pieces, None)
+            screen.blit(surface, position)
+        while piece is not None:
+            screen.blit(piece.surface, (piece.rect.x - camera_x, piece.rect.y - camera_y))
+            piece = next(pieces, None)
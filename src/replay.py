@@ -0,0 +1,77 @@
+import json
+import pygame
+
+# Keys the game reads from pygame.key.get_pressed(), by the name stored in recordings
+TRACKED_KEYS = {
+    "w": pygame.K_w,
+    "a": pygame.K_a,
+    "s": pygame.K_s,
+    "d": pygame.K_d,
+    "e": pygame.K_e,
+    "q": pygame.K_q,
+    "tab": pygame.K_TAB,
+}
+
+
+class ReplayKeys:
+    """Stands in for pygame.key.get_pressed() with a fixed set of held keys."""
+
+    def __init__(self, held=()):
+        self.held = frozenset(held)
+
+    def __getitem__(self, key):
+        return key in self.held
+
+
+def event_to_record(event):
+    """Converts a pygame event the Game reacts to into plain data, or None."""
+    if event.type in (pygame.KEYDOWN, pygame.KEYUP):
+        return {"type": "keydown" if event.type == pygame.KEYDOWN else "keyup", "key": event.key}
+    if event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+        return {"type": "mousedown" if event.type == pygame.MOUSEBUTTONDOWN else "mouseup",
+                "pos": list(event.pos), "button": event.button}
+    return None
+
+
+def record_to_event(record):
+    """Turns a recorded event back into a pygame event."""
+    if record["type"] in ("keydown", "keyup"):
+        event_type = pygame.KEYDOWN if record["type"] == "keydown" else pygame.KEYUP
+        return pygame.event.Event(event_type, key=record["key"])
+    event_type = pygame.MOUSEBUTTONDOWN if record["type"] == "mousedown" else pygame.MOUSEBUTTONUP
+    return pygame.event.Event(event_type, pos=tuple(record["pos"]), button=record["button"])
+
+
+class InputRecorder:
+    """
+    Records the input of every simulation tick as one JSON line:
+    {"keys": [...held keys...], "events": [...events handled before this tick...]}
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "w")
+        self.pending_events = []
+
+    def add_event(self, event):
+        record = event_to_record(event)
+        if record is not None:
+            self.pending_events.append(record)
+
+    def add_tick(self, keys):
+        held = [name for name, key in TRACKED_KEYS.items() if keys[key]]
+        self.file.write(json.dumps({"keys": held, "events": self.pending_events}) + "\n")
+        self.pending_events = []
+
+    def close(self):
+        self.file.close()
+
+
+def load_recording(path):
+    """Yields (ReplayKeys, [pygame events]) for every recorded tick."""
+    with open(path) as file:
+        for line in file:
+            if not line.strip():
+                continue
+            tick = json.loads(line)
+            keys = ReplayKeys(TRACKED_KEYS[name] for name in tick["keys"])
+            yield keys, [record_to_event(record) for record in tick["events"]]
@@ -0,0 +1,53 @@
+class SpatialGrid:
+    """
+    Uniform grid broadphase for static rects (collision boxes, interactive objects, exits).
+    Every item is stored in each cell its rect touches, so a query only has to look at
+    the few cells under the query box instead of every object on the map.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}  # (col, row) -> list of (rect, item)
+        self.count = 0
+
+    def insert(self, rect, item):
+        """Adds an item with its pygame.Rect to every cell the rect overlaps."""
+        for cell in self.cells_for(rect):
+            self.cells.setdefault(cell, []).append((rect, item))
+        self.count += 1
+
+    def cells_for(self, rect):
+        """Yields the (col, row) keys of all cells touched by rect."""
+        size = self.cell_size
+        first_col, last_col = rect.left // size, (rect.right - 1) // size
+        first_row, last_row = rect.top // size, (rect.bottom - 1) // size
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                yield col, row
+
+    def query(self, rect):
+        """Returns all items whose rect overlaps the given rect."""
+        size = self.cell_size
+        first_col, last_col = rect.left // size, (rect.right - 1) // size
+        first_row, last_row = rect.top // size, (rect.bottom - 1) // size
+        cells = self.cells
+
+        # Fast path: the box sits inside a single cell, so there can't be duplicates
+        if first_col == last_col and first_row == last_row:
+            bucket = cells.get((first_col, first_row))
+            if not bucket:
+                return []
+            return [item for item_rect, item in bucket if rect.colliderect(item_rect)]
+
+        found = []
+        seen = set()
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                bucket = cells.get((col, row))
+                if not bucket:
+                    continue
+                for item_rect, item in bucket:
+                    if id(item) not in seen and rect.colliderect(item_rect):
+                        seen.add(id(item))
+                        found.append(item)
+        return found
@@ -1,4 +1,11 @@
 import pygame
+from assets import acquire_slot_images, registry
+from inventory import ITEM_NAMES
+from log import get_logger
+from text_cache import text_cache
+from ui_panel import RetainedPanel
+
+logger = get_logger("storage")
 
 
 class Storage:
@@ -9,22 +16,28 @@ class Storage:
         self.slot_height = 32 * 4
         self.padding = 1
 
-        # ✅ Load images
-        self.slot_image = pygame.image.load("../assets/ui/inventory_slot.png").convert_alpha()
-        self.slot_image = pygame.transform.scale(self.slot_image, (self.slot_width, self.slot_height))
+        # ✅ Images are shared by every storage (and the inventory), a new storage only allocates its slots
+        self.images_key, (self.slot_image, self.item_images) = acquire_slot_images(
+            (self.slot_width, self.slot_height), ITEM_NAMES)
+        self.panel = RetainedPanel()  # Allocated on the first draw, so unopened storages cost nothing
 
-        self.item_images = {
-            "Wheat": pygame.image.load("../assets/items/wheat.png").convert_alpha(),
-            "Flour": pygame.image.load("../assets/items/flour.png").convert_alpha(),
-        }
-        self.item_images = {name: pygame.transform.scale(img, (48, 48)) for name, img in self.item_images.items()}
+    def release(self):
+        """Gives the shared images back to the registry, call when the storage is removed."""
+        registry.release(self.images_key)
 
     def draw(self, screen, font):
-        """Draws the storage UI."""
+        """Draws the storage UI, from a retained panel that is only repainted when the items change."""
         total_width = (self.slot_width * self.max_slots) + (self.padding * (self.max_slots - 1))
         start_x = (screen.get_width() - total_width) // 2
         y = screen.get_height() // 2 - self.slot_height
 
+        step = self.slot_width * (2 / 3) + self.padding
+        size = (int((self.max_slots - 1) * step) + self.slot_width, self.slot_height)
+        signature = (font, tuple(item and (item["name"], item["count"]) for item in self.items))
+        self.panel.draw(screen, (start_x, y), size, signature, lambda surface: self.draw_slots(surface, font, 0, 0))
+
+    def draw_slots(self, screen, font, start_x, y):
+        """Paints the slots, items and counts with the first slot at (start_x, y)."""
         for i in range(self.max_slots):
             x = start_x + i * (self.slot_width * (2 / 3) + self.padding)
             screen.blit(self.slot_image, (x, y))
@@ -37,11 +50,10 @@ class Storage:
                 if self.items[i]["name"] in self.item_images:
                     screen.blit(self.item_images[self.items[i]["name"]], (item_x, item_y))
                 else:
-                    print(f"⚠️ WARNING: Image for {self.items[i]['name']} not found!")  # ✅ Debugging
+                    logger.warning("⚠️ Image for %s not found!", self.items[i]["name"])
 
                 # Draw item count
-                item_count = font.render(f"x{self.items[i]['count']}", True, (0, 0, 0))
-                screen.blit(item_count, (x + 40, y + 45))
+                text_cache.draw(screen, font, f"x{self.items[i]['count']}", (0, 0, 0), (x + 40, y + 45))
 
     def get_slot_index(self, mouse_pos):
         """Returns the index of the storage slot under the mouse."""
@@ -61,7 +73,7 @@ class Storage:
         slot_index = self.get_slot_index(mouse_pos)
 
         if slot_index is not None and self.items[slot_index]:  # ✅ Item exists in slot
-            print(f"🖱️ Picking up {self.items[slot_index]['name']} from storage!")
+            logger.debug("🖱️ Picking up %s from storage!", self.items[slot_index]["name"])
 
             # ✅ Assign dragged item to inventory dragging system
             player_inventory.dragging_item = self.items[slot_index]
@@ -91,7 +103,8 @@ class Storage:
                         player_inventory.items[inventory_slot_index], player_inventory.dragging_item = \
                             player_inventory.dragging_item, player_inventory.items[inventory_slot_index]
 
-                print(f"✅ Moved {player_inventory.dragging_item['name']} to inventory slot {inventory_slot_index}!")
+                logger.debug("✅ Moved %s to inventory slot %d!", player_inventory.dragging_item["name"],
+                             inventory_slot_index)
                 player_inventory.dragging_item = None  # ✅ Reset dragging item
 
             elif storage_slot_index is not None:  # ✅ Dropping into another storage slot
@@ -105,12 +118,13 @@ class Storage:
                         self.items[storage_slot_index], player_inventory.dragging_item = \
                             player_inventory.dragging_item, self.items[storage_slot_index]
 
-                print(f"✅ Moved {player_inventory.dragging_item['name']} to storage slot {storage_slot_index}!")
+                logger.debug("✅ Moved %s to storage slot %d!", player_inventory.dragging_item["name"],
+                             storage_slot_index)
                 player_inventory.dragging_item = None  # ✅ Reset dragging item
 
             else:
                 # ✅ If dropped outside storage & inventory, return to storage slot
-                print(f"🔄 Returning {player_inventory.dragging_item['name']} back to storage!")
+                logger.debug("🔄 Returning %s back to storage!", player_inventory.dragging_item["name"])
                 for i in range(self.max_slots):
                     if self.items[i] is None:  # Find an empty slot
                         self.items[i] = player_inventory.dragging_item
@@ -128,6 +142,12 @@ class StorageManager:
         if storage_id not in self.storages:
             self.storages[storage_id] = Storage(slots)
 
+    def remove_storage(self, storage_id):
+        """Removes a storage and releases its shared images."""
+        storage = self.storages.pop(storage_id, None)
+        if storage:
+            storage.release()
+
     def get_storage(self, storage_id):
         """Retrieves the storage with the given ID."""
         return self.storages.get(storage_id, None)
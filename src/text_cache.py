@@ -0,0 +1,55 @@
+from collections import OrderedDict
+
+GLYPH_CHARACTERS = frozenset("0123456789x")  # Counter labels like "x12" are drawn glyph by glyph
+
+
+class TextCache:
+    """
+    Rendered text surfaces keyed by (font, text, color, antialias), least recently used
+    entries are dropped after max_entries. draw() puts strings made only of
+    GLYPH_CHARACTERS together from cached single glyphs, so a changing counter neither
+    needs a TTF render nor pushes the other labels out of the cache.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()  # (font, text, color, antialias) -> surface
+        self.glyphs = {}  # (font, character, color, antialias) -> (surface, advance)
+
+    def render(self, font, text, color, antialias=True):
+        """Drop-in for font.render(text, antialias, color), the surface must not be modified."""
+        key = (font, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def get_glyph(self, font, character, color, antialias):
+        """Returns (glyph surface, advance width) of a single character."""
+        key = (font, character, color, antialias)
+        glyph = self.glyphs.get(key)
+        if glyph is None:
+            glyph = (font.render(character, antialias, color), font.metrics(character)[0][4])
+            self.glyphs[key] = glyph
+        return glyph
+
+    def draw(self, screen, font, text, color, position, antialias=True):
+        """Blits text with its top left corner at position."""
+        if text and GLYPH_CHARACTERS.issuperset(text):
+            x, y = position
+            color = tuple(color)
+            for character in text:
+                glyph, advance = self.get_glyph(font, character, color, antialias)
+                screen.blit(glyph, (x, y))
+                x += advance
+        else:
+            screen.blit(self.render(font, text, color, antialias), position)
+
+
+text_cache = TextCache()  # Shared by all UI code
@@ -0,0 +1,33 @@
+import pygame
+
+
+class RetainedPanel:
+    """
+    A piece of UI that is painted once into its own surface and after that only blitted.
+    It is repainted when its signature (a tuple of everything the content depends on,
+    e.g. the items and counts) changes. Transparent panels keep per-pixel alpha, opaque
+    ones (alpha=False) are for panels that cover everything below them.
+    """
+
+    def __init__(self, alpha=True):
+        self.alpha = alpha
+        self.surface = None
+        self.signature = None
+        self.repaints = 0
+
+    def draw(self, screen, position, size, signature, paint):
+        """Blits the panel at position, calling paint(surface) first if signature changed."""
+        if self.surface is None or self.surface.get_size() != size:
+            self.surface = pygame.Surface(size, pygame.SRCALPHA) if self.alpha else pygame.Surface(size)
+            self.signature = None
+        if signature != self.signature:
+            if self.alpha:
+                self.surface.fill((0, 0, 0, 0))
+            paint(self.surface)
+            self.signature = signature
+            self.repaints += 1
+        screen.blit(self.surface, position)
+
+    def invalidate(self):
+        """Forces a repaint on the next draw."""
+        self.signature = None